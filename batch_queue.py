@@ -0,0 +1,64 @@
+"""
+Batch Queue
+The queue handling shared by the background writers (log_writer.py and
+session_store.py): items are gathered into batches of bounded size and age,
+and a stop marker ends the writer thread after the queue has been drained.
+"""
+
+import queue
+import time
+
+STOP = object()
+
+def next_batch(items, max_batch, flush_interval):
+    """Gather up to max_batch items from the queue, waiting at most flush_interval seconds
+
+    Returns (batch, stopping). Once the stop marker is taken, whatever is still
+    queued is drained into the batch and stopping is True.
+    """
+    batch = []
+    stopping = False
+    deadline = time.monotonic() + flush_interval
+    while len(batch) < max_batch:
+        try:
+            item = items.get(timeout=max(deadline - time.monotonic(), 0.0))
+        except queue.Empty:
+            break
+        if item is STOP:
+            stopping = True
+            break
+        batch.append(item)
+
+    # On shutdown, drain whatever is still queued
+    if stopping:
+        while True:
+            try:
+                item = items.get_nowait()
+            except queue.Empty:
+                break
+            if item is not STOP:
+                batch.append(item)
+    return batch, stopping
+
+def stop_writer(items, thread, timeout=5.0):
+    """Queue the stop marker and wait for the writer thread to finish its last batch
+
+    Items that were queued after the writer drained the queue are discarded;
+    returns how many, for the writer's dropped counter.
+    """
+    try:
+        items.put(STOP, timeout=timeout)
+    except queue.Full:
+        pass
+    thread.join(timeout)
+    if thread.is_alive():
+        return 0
+
+    discarded = 0
+    while True:
+        try:
+            item = items.get_nowait()
+        except queue.Empty:
+            return discarded
+        if item is not STOP:
+            discarded += 1
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Emotion Classifier Benchmark
+Compares per-crop latency of DeepFace.analyze with the direct EmotionClassifier path
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from emotion_classifier import EmotionClassifier, EMOTIONS
+from face_crops import load_crops
+
+def time_per_crop(fn, crops, repeat=1):
+    """Return per-crop latencies in milliseconds"""
+    latencies = []
+    for _ in range(repeat):
+        for crop in crops:
+            start = time.perf_counter()
+            fn(crop)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.array(latencies)
+
+def print_stats(name, latencies):
+    """Print one row of the results table"""
+    print(f"{name:<28} {latencies.mean():8.2f} {np.median(latencies):8.2f} "
+          f"{np.percentile(latencies, 95):8.2f}")
+
+def main(argv=None):
+    """Main function to run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark DeepFace.analyze against the direct emotion classifier")
+    parser.add_argument("--images", default=None, help="Directory of face crops (default: synthetic faces)")
+    parser.add_argument("--count", type=int, default=50, help="Number of crops")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the crops")
+    parser.add_argument("--batch", type=int, default=8, help="Batch size for the batched path")
+    args = parser.parse_args(argv)
+
+    from deepface import DeepFace
+
+    crops = load_crops(args.images, args.count)
+    classifier = EmotionClassifier()
+
+    def deepface_analyze(crop):
+        result = DeepFace.analyze(crop, actions=['emotion'], enforce_detection=False)
+        return result[0] if isinstance(result, list) else result
+
+    # Warm up both paths so model building is not measured
+    deepface_analyze(crops[0])
+    classifier.classify(crops[0])
+
+    print(f"{len(crops)} crops x {args.repeat} passes, latency per crop in ms")
+    print(f"{'path':<28} {'mean':>8} {'median':>8} {'p95':>8}")
+
+    print_stats("DeepFace.analyze", time_per_crop(deepface_analyze, crops, args.repeat))
+    print_stats("EmotionClassifier.classify", time_per_crop(classifier.classify, crops, args.repeat))
+
+    # Batched path, latency amortized over the crops of each batch
+    batch_latencies = []
+    for _ in range(args.repeat):
+        for i in range(0, len(crops), args.batch):
+            batch = crops[i:i + args.batch]
+            start = time.perf_counter()
+            classifier.classify_batch(batch)
+            batch_latencies.extend([(time.perf_counter() - start) * 1000.0 / len(batch)] * len(batch))
+    print_stats(f"classify_batch (n={args.batch})", np.array(batch_latencies))
+
+    # How often both paths agree on the dominant emotion
+    agree = sum(deepface_analyze(crop)['dominant_emotion'] == EMOTIONS[int(classifier.classify(crop).argmax())]
+                for crop in crops)
+    print(f"\nDominant emotion agreement: {agree}/{len(crops)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Quantized Emotion Model Benchmark
+Compares latency and accuracy of the int8 TFLite emotion model with the float Keras model
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmark_classifier import time_per_crop, print_stats
+from emotion_classifier import EmotionClassifier, load_emotion_model, EMOTIONS
+from face_crops import load_crops
+from quantized_model import DEFAULT_MODEL_PATH, calibrate_emotion_model, load_quantized_model
+
+def batch_latencies(classifier, crops, batch_size, repeat=1):
+    """Return per-crop latencies in milliseconds, amortized over each batch"""
+    latencies = []
+    for _ in range(repeat):
+        for i in range(0, len(crops), batch_size):
+            batch = crops[i:i + batch_size]
+            start = time.perf_counter()
+            classifier.classify_batch(batch)
+            latencies.extend([(time.perf_counter() - start) * 1000.0 / len(batch)] * len(batch))
+    return np.array(latencies)
+
+def main(argv=None):
+    """Main function to run the comparison"""
+    parser = argparse.ArgumentParser(description="Compare the int8 emotion model with the float model")
+    parser.add_argument("--images", default=None, help="Directory of face crops (default: synthetic faces)")
+    parser.add_argument("--count", type=int, default=50, help="Number of crops")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the crops")
+    parser.add_argument("--batch", type=int, default=8, help="Batch size for the batched path")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path of the cached int8 model")
+    parser.add_argument("--rebuild", action="store_true", help="Convert the model again even if it is cached")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    parser.add_argument("--calibration", default=None, metavar="DIR",
+                        help="Convert the model again, calibrated on the face crops in DIR")
+    args = parser.parse_args(argv)
+
+    # The same fixed crops are used for every run (synthetic ones are seeded)
+    crops = load_crops(args.images, args.count)
+
+    start = time.perf_counter()
+    float_classifier = EmotionClassifier(model=load_emotion_model('keras'))
+    float_load = time.perf_counter() - start
+
+    if args.calibration:
+        calibrate_emotion_model(args.calibration, args.model)
+
+    start = time.perf_counter()
+    int8_classifier = EmotionClassifier(model=load_quantized_model(args.model, args.rebuild, args.threads))
+    int8_load = time.perf_counter() - start
+
+    print(f"Model load: float {float_load:.2f}s, int8 {int8_load:.2f}s "
+          f"(int8 model {os.path.getsize(args.model) / 1024:.0f} KB)")
+
+    # Warm up both models so first-call overhead is not measured
+    float_classifier.classify(crops[0])
+    int8_classifier.classify(crops[0])
+
+    print(f"\n{len(crops)} crops x {args.repeat} passes, latency per crop in ms")
+    print(f"{'path':<28} {'mean':>8} {'median':>8} {'p95':>8}")
+    print_stats("float classify", time_per_crop(float_classifier.classify, crops, args.repeat))
+    print_stats("int8 classify", time_per_crop(int8_classifier.classify, crops, args.repeat))
+    print_stats(f"float classify_batch (n={args.batch})",
+                batch_latencies(float_classifier, crops, args.batch, args.repeat))
+    print_stats(f"int8 classify_batch (n={args.batch})",
+                batch_latencies(int8_classifier, crops, args.batch, args.repeat))
+
+    # Accuracy of the int8 model relative to the float model
+    float_probabilities = np.array([float_classifier.classify(crop) for crop in crops])
+    int8_probabilities = np.array([int8_classifier.classify(crop) for crop in crops])
+    difference = np.abs(float_probabilities - int8_probabilities)
+    agree = int((float_probabilities.argmax(axis=1) == int8_probabilities.argmax(axis=1)).sum())
+
+    print(f"\nDominant emotion agreement: {agree}/{len(crops)}")
+    print(f"Probability difference: mean {difference.mean():.4f}, max {difference.max():.4f}")
+    for i, emotion in enumerate(EMOTIONS):
+        print(f"  {emotion:<10} mean {difference[:, i].mean():.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Crop Result Cache
+Reuses emotion probabilities for face crops that look almost the same as a
+recently classified crop, so a still face does not pay for full inference.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+class CropResultCache:
+    """Cache probability vectors keyed on a small normalized thumbnail of the face crop
+
+    A crop hits the cache when the mean absolute difference between its signature
+    and a cached one is at most max_distance (in units of the thumbnail's standard
+    deviation). Entries older than max_age seconds are never reused; when the cache
+    is full, expired entries are replaced first and then the least recently used one.
+    Ages are measured in the `now` passed to lookup/store (the frame's capture time),
+    falling back to the wall clock.
+    """
+
+    def __init__(self, capacity=32, max_distance=0.1, max_age=2.0, thumbnail_size=16):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.thumbnail_size = thumbnail_size
+
+        # Fixed-size tables so a lookup is one vectorized distance computation
+        self.signatures = np.zeros((capacity, thumbnail_size * thumbnail_size), dtype=np.float32)
+        self.values = [None] * capacity
+        self.stored_at = np.full(capacity, -np.inf)
+        self.last_used = np.full(capacity, -np.inf)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def signature(self, crop):
+        """Downsample the crop to a grayscale thumbnail normalized for brightness and contrast"""
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        thumbnail = cv2.resize(gray, (self.thumbnail_size, self.thumbnail_size),
+                               interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        thumbnail -= thumbnail.mean()
+        thumbnail /= max(float(thumbnail.std()), 1.0)
+        return thumbnail
+
+    def lookup(self, signature, now=None):
+        """Return the cached probabilities for a similar crop, or None"""
+        now = time.time() if now is None else now
+
+        valid = now - self.stored_at <= self.max_age
+        if valid.any():
+            distances = np.abs(self.signatures - signature).mean(axis=1)
+            distances[~valid] = np.inf
+            best = int(np.argmin(distances))
+            if distances[best] <= self.max_distance:
+                self.hits += 1
+                self.last_used[best] = now
+                return self.values[best]
+
+        self.misses += 1
+        return None
+
+    def store(self, signature, probabilities, now=None):
+        """Remember the probabilities computed for a crop"""
+        now = time.time() if now is None else now
+
+        # Reuse an expired (or empty) slot, otherwise evict the least recently used entry
+        expired = np.flatnonzero(now - self.stored_at > self.max_age)
+        if len(expired) > 0:
+            slot = int(expired[0])
+        else:
+            slot = int(np.argmin(self.last_used))
+            self.evictions += 1
+
+        self.signatures[slot] = signature
+        self.values[slot] = probabilities
+        self.stored_at[slot] = now
+        self.last_used[slot] = now
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self):
+        """Return cache counters for display or logging"""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hit_rate()}
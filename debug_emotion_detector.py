@@ -1,45 +1,104 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import threading
-import time
-from deepface import DeepFace
-import os
 from datetime import datetime
-from collections import defaultdict, deque
+from frame_grabber import FrameGrabber
+from frame_recorder import FrameRecorder, DEFAULT_CAPACITY
+from frame_sources import open_frame_source, describe_source
+from face_search import DETECTION_WIDTH, mediapipe_face_boxes
+from model_loader import StartupTimer, BackgroundLoader, load_emotion_models
+from crop_cache import CropResultCache
+from frame_scheduler import AdaptiveScheduler
+from frame_display import FrameDisplay
+from face_identities import FaceIdentities
+from emotion_history import EmotionHistory, ring_weights, default_weight_curve
+from emotion_aggregators import DecayedEmotionAggregator
+from log_writer import BatchedLogWriter
+from session_store import SessionWriter
 
 class DebugEmotionDetector:
-    def __init__(self):
-        self.mp_face_detection = mp.solutions.face_detection
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.face_detection = self.mp_face_detection.FaceDetection(
-            model_selection=1, min_detection_confidence=0.5
-        )
-        
+    def __init__(self, source=0, record_path=None, record_frames=DEFAULT_CAPACITY, detection_width=DETECTION_WIDTH, cache_distance=0.1,
+                 target_fps=10.0, cpu_budget=0.8, backend='keras', model_server=None, max_idle=2.0, max_tracks=16,
+                 history_length=20, weight_curve=default_weight_curve, mood_half_life=2.0, log_path="emotionLog.txt",
+                 log_max_bytes=10 * 1024 * 1024, log_rotate_daily=False, log_fsync='interval', store_path=None,
+                 camera_id=None, store_frames=False):
+        self.startup = StartupTimer()
+        
+        # MediaPipe and the emotion model are loaded in the background (see load_models);
+        # backend 'int8' runs the quantized emotion model (see quantized_model.py)
+        self.face_detection = None
+        self.classifier = None
+        self.backend = backend
+        self.model_server = model_server  # Address of a shared model server, None for in-process
+        
+        self.source = source  # Camera index or frame source spec (see frame_sources.py)
+        self.record_path = record_path  # Record processed frames here for later replay
+        self.record_frames = record_frames  # Frames the recording can hold
+        self.detection_width = detection_width  # Faces are detected on a copy this wide
         self.cap = None
+        self.grabber = None
+        self.video_thread = None
         self.is_running = False
+        self.frames_processed = 0
         self.current_emotion = "No face detected"
         self.emotion_confidence = 0.0
         self.debug_info = "Initializing..."
         
-        # Emotion tracking with sliding window
-        self.emotion_window = deque(maxlen=30)  # 3 seconds * 10 FPS = 30 frames
+        # Emotion labels
+        self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+        
+        # Every face gets a stable id with its own sliding window (the last 3 seconds of frames),
+        # emotionCache and emotionScore (see emotion_history.py); faces unseen for max_idle
+        # seconds are dropped and at most max_tracks are kept
         self.window_duration = 3.0  # 3 seconds
         
-        # New emotion recording system
-        self.counter = 0  # Counter that starts at 0
-        self.emotionCache = [[0.0] * 7 for _ in range(20)]  # 2D array with 20 entries, each entry is size 7
-        self.emotionScore = [0.0] * 7  # Array with size 7, each entry corresponds to an emotion
-        self.last_record_time = time.time()
+        # emotionCache keeps history_length records per face; emotionScore weighs them by age
+        # with weight_curve, precomputed once for all faces
+        self.history_length = history_length
+        self.history_weights = ring_weights(history_length, weight_curve)
         
-        # Emotion labels
-        self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+        # A smooth current mood per face: the probability vectors averaged with a decay half-life
+        # of mood_half_life seconds, readable on every frame (None disables it)
+        self.mood_half_life = mood_half_life
+        self.face_identities = FaceIdentities(max_idle=max_idle, max_tracks=max_tracks,
+                                              state_factory=self.new_history)
+        self.primary_track = None  # Face shown in the emotion labels
+        
+        # The emotion model is fed the MediaPipe crop directly; crops within cache_distance
+        # of a recent one reuse its result (None disables the cache)
+        self.crop_cache = CropResultCache(max_distance=cache_distance) if cache_distance is not None else None
+        
+        # emotionScore records go to log_path from a background writer in batches, so a slow disk
+        # never stalls the loop; the log is rotated at log_max_bytes (and daily with log_rotate_daily)
+        self.log_writer = BatchedLogWriter(log_path, fsync=log_fsync, max_bytes=log_max_bytes,
+                                           rotate_daily=log_rotate_daily)
         
-        # Create GUI
+        # Optionally also store the records, and with store_frames every face's per-frame result, in a
+        # SQLite session store (see session_store.py), written in batched transactions off the loop
+        self.session_writer = SessionWriter(store_path, camera_id) if store_path else None
+        self.store_frames = store_frames
+        
+        # Paces the loop to target_fps and backs off inference when a frame exceeds its budget
+        self.scheduler = AdaptiveScheduler(target_fps=target_fps, cpu_budget=cpu_budget)
+        
+        # Create GUI, then load the models while it comes up
         self.setup_gui()
+        self.models = BackgroundLoader(self.load_models, on_done=self.on_models_loaded).start()
+        
+    def load_models(self):
+        """Import and build MediaPipe and the emotion model and warm them up (loader thread)"""
+        self.face_detection, self.classifier = load_emotion_models(
+            self.startup, self.emotions, cache=self.crop_cache, backend=self.backend,
+            model_server=self.model_server, client_name=type(self).__name__)
+        
+    def on_models_loaded(self, result, error):
+        """Report the startup timing once loading has finished"""
+        message = f"Model loading failed: {error}" if error else f"Ready to start - {self.startup.report()}"
+        print(message)
+        if not self.is_running:
+            self.root.after(0, lambda: self.status_label.config(text=message))
         
     def setup_gui(self):
         """Setup the main GUI window with debug information"""
@@ -70,6 +129,7 @@ class DebugEmotionDetector:
         
         self.video_label = tk.Label(self.video_frame, bg='#34495e')
         self.video_label.pack(padx=10, pady=10)
+        self.display = FrameDisplay(self.root, self.video_label, 640, 480)
         
         # Debug information frame
         debug_frame = tk.Frame(main_frame, bg='#2c3e50')
@@ -100,7 +160,7 @@ class DebugEmotionDetector:
         self.window_label.pack()
         
         # Counter display
-        self.counter_label = ttk.Label(emotion_frame, text="Counter: 0/20", 
+        self.counter_label = ttk.Label(emotion_frame, text=f"Counter: 0/{self.history_length}", 
                                       style='Confidence.TLabel')
         self.counter_label.pack()
         
@@ -121,7 +181,7 @@ class DebugEmotionDetector:
         self.stop_button.pack(side='left', padx=10)
         
         # Status bar
-        self.status_label = tk.Label(main_frame, text="Ready to start", 
+        self.status_label = tk.Label(main_frame, text="Loading models...", 
                                     bg='#34495e', fg='white', font=('Arial', 10))
         self.status_label.pack(pady=10)
         
@@ -131,9 +191,18 @@ class DebugEmotionDetector:
     def start_camera(self):
         """Start the webcam and emotion detection"""
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.source)
             if not self.cap.isOpened():
-                raise Exception("Could not open webcam")
+                raise Exception(f"Could not open {describe_source(self.source)}")
+            
+            # Read frames on a dedicated thread so processing always gets the freshest frame
+            recorder = FrameRecorder(self.record_path, self.record_frames) if self.record_path else None
+            self.grabber = FrameGrabber(self.cap, recorder).start()
+            
+            # Replays are analyzed frame by frame at the pace the source sets; recordings
+            # and replays run inference at a fixed stride so both make the same decisions
+            self.scheduler.set_lossless(self.grabber.lossless)
+            self.scheduler.pin_stride(self.grabber.pinned_stride)
             
             self.is_running = True
             self.start_button.config(state='disabled')
@@ -151,7 +220,11 @@ class DebugEmotionDetector:
     def stop_camera(self):
         """Stop the webcam and emotion detection"""
         self.is_running = False
-        if self.cap:
+        if self.grabber:
+            # The grabber releases the capture once its thread is out of cap.read()
+            self.grabber.stop(release=True)
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         self.start_button.config(state='normal')
@@ -159,266 +232,254 @@ class DebugEmotionDetector:
         self.status_label.config(text="Camera stopped")
         
         # Clear video display
-        self.video_label.config(image='')
-        
-    def calculate_emotion_score(self):
-        """Calculate emotionScore based on weighted history"""
-        # Set all values in emotionScore to 0
-        self.emotionScore = [0.0] * 7
-        
-        # Loop through the emotionCache
-        for i in range(20):
-            # Calculate time difference: (counter - current index of emotionCache)
-            time_diff = (self.counter - i) % 20  # Handle wraparound
+        self.display.clear()
+        
+    def new_history(self, track_id):
+        """Emotion state for a newly tracked face"""
+        mood = DecayedEmotionAggregator(len(self.emotions), self.mood_half_life) if self.mood_half_life else None
+        return EmotionHistory(self.emotions, window_duration=self.window_duration,
+                              cache_size=self.history_length, weights=self.history_weights, mood=mood)
+        
+    def record_emotion_data(self, track, slot):
+        """Report a face's emotion data, recorded every 3 seconds of capture time into slot"""
+        if slot is None:
+            return
+        history = track.state
             
-            # Determine weight based on time difference
-            if time_diff <= 5:
-                weight = 100 - 10 * time_diff
-            elif time_diff <= 10:
-                weight = 75 - 5 * time_diff
-            else:
-                weight = 25
-                
-            # Add weighted values to emotionScore for each emotion
-            for emotion_idx in range(7):
-                self.emotionScore[emotion_idx] += self.emotionCache[i][emotion_idx] * weight
-                
-    def record_emotion_data(self):
-        """Record emotion data every 3 seconds"""
-        current_time = time.time()
-        
-        # Check if 3 seconds have passed
-        if current_time - self.last_record_time >= 3.0:
-            # Calculate emotion presence times for ALL emotions in the current window
-            emotion_counts = defaultdict(int)
-            total_frames = len(self.emotion_window)
-            
-            if total_frames > 0:
-                for emotion, timestamp in self.emotion_window:
-                    emotion_counts[emotion] += 1
-                
-                # Calculate presence time for ALL emotions and record in emotionCache
-                for i, emotion in enumerate(self.emotions):
-                    count = emotion_counts.get(emotion, 0)
-                    presence_time = (count / total_frames) * self.window_duration
-                    self.emotionCache[self.counter][i] = presence_time
-                
-                # Calculate emotionScore
-                self.calculate_emotion_score()
-                
-                # Log to emotionLog.txt
-                self.log_emotion_scores()
-                
-                # Log the recording
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                print(f"\n{'='*60}")
-                print(f"RECORDING EMOTION DATA - Counter: {self.counter}/20")
-                print(f"Time: {timestamp}")
-                print("Emotion presence times in current 3s window:")
-                for i, emotion in enumerate(self.emotions):
-                    presence_time = self.emotionCache[self.counter][i]
-                    print(f"  {emotion}: {presence_time:.1f}s")
-                print("\nCurrent emotionScores:")
-                for i, emotion in enumerate(self.emotions):
-                    score = self.emotionScore[i]
-                    print(f"  {emotion}: {score:.1f}")
-                print(f"{'='*60}\n")
-                
-                # Increment counter
-                self.counter += 1
-                if self.counter >= 20:
-                    self.counter = 0
-                
-                # Update last record time
-                self.last_record_time = current_time
+        # Log to the emotion log
+        self.log_emotion_scores(track)
+        
+        # Log the recording
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"\n{'='*60}")
+        print(f"RECORDING EMOTION DATA - Face #{track.track_id} - Counter: {slot}/{self.history_length}")
+        print(f"Time: {timestamp}")
+        print("Emotion presence times in current 3s window:")
+        for i, emotion in enumerate(self.emotions):
+            presence_time = history.emotionCache[slot][i]
+            print(f"  {emotion}: {presence_time:.1f}s")
+        print("\nCurrent emotionScores:")
+        for i, emotion in enumerate(self.emotions):
+            score = history.emotionScore[i]
+            print(f"  {emotion}: {score:.1f}")
+        print(f"{'='*60}\n")
                 
-    def log_emotion_scores(self):
-        """Log emotion scores to emotionLog.txt"""
+    def log_emotion_scores(self, track):
+        """Log a face's emotion scores to the emotion log"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Create compact log entry
-        log_entry = f"{timestamp}"
+        log_entry = f"{timestamp} face:{track.track_id}"
         for i, emotion in enumerate(self.emotions):
-            score = self.emotionScore[i]
+            score = track.state.emotionScore[i]
             log_entry += f" {emotion}:{score:.1f}"
         log_entry += "\n"
         
-        # Write to file
-        try:
-            with open("emotionLog.txt", "a") as f:
-                f.write(log_entry)
-        except Exception as e:
-            print(f"Error writing to emotionLog.txt: {e}")
-        
-    def update_emotion_window(self, emotion):
-        """Add current emotion to the sliding window"""
-        current_time = time.time()
-        self.emotion_window.append((emotion, current_time))
-        
-    def get_window_stats(self):
-        """Get current window statistics for display"""
-        if len(self.emotion_window) == 0:
-            return "Window: 0/3.0s", {}
-            
-        emotion_counts = defaultdict(int)
-        for emotion, timestamp in self.emotion_window:
-            emotion_counts[emotion] += 1
-            
-        total_frames = len(self.emotion_window)
-        window_time = total_frames * 0.1  # 10 FPS = 0.1 seconds per frame
-        
-        # Find most common emotion
-        if emotion_counts:
-            most_common = max(emotion_counts.items(), key=lambda x: x[1])
-            emotion, count = most_common
-            presence_time = (count / total_frames) * window_time
-            window_text = f"Window: {presence_time:.1f}/{window_time:.1f}s ({emotion})"
-        else:
-            window_text = f"Window: 0.0/{window_time:.1f}s"
-            
-        return window_text, dict(emotion_counts)
+        # Queue for the background writers
+        self.log_writer.write(log_entry)
+        if self.session_writer is not None:
+            self.session_writer.add_record(track.state.emotionScore, track.state.last_record_time, track.track_id)
+        
+    def mood_text(self, track):
+        """A face's current decayed mood for display"""
+        mood = track.state.mood if track is not None else None
+        emotion = mood.dominant() if mood is not None else None
+        if emotion is None:
+            return "Mood: -"
+        return f"Mood: {self.emotions[emotion]} ({mood.scores()[emotion]:.0%})"
+        
+    def get_window_stats(self, track):
+        """Get a face's current window statistics for display"""
+        if track is None:
+            return f"Window: 0/{self.window_duration:.1f}s", {}
+        return track.state.get_window_stats()
         
     def process_video(self):
         """Process video frames and detect emotions with debug info"""
         frame_count = 0
         emotion_detection_count = 0
         
+        grabber = self.grabber
+        cache = self.crop_cache
+        scheduler = self.scheduler
+        
+        # Wait for the background model loading started with the GUI
+        if not self.models.ready():
+            self.debug_info = "Loading models..."
+            self.root.after(0, self.update_debug_display)
+        try:
+            self.models.result()
+        except Exception as e:
+            self.debug_info = f"Error loading models: {e}"
+            self.root.after(0, self.update_debug_display)
+            return
+        
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            # Always take the newest captured frame; stale ones are dropped by the grabber
+            captured = grabber.read_latest()
+            if captured is None:
+                if grabber.ended:
+                    # The source has no more frames, e.g. the end of a replay
+                    self.root.after(0, self.stop_camera)
+                    break
                 self.debug_info = "Failed to read frame from camera"
                 self.root.after(0, self.update_debug_display)
                 continue
                 
+            frame = captured.frame
+            self.frames_processed += 1
             frame_count += 1
+            scheduler.begin_frame()
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             
-            # Convert to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Detect faces on a downscaled copy; boxes come back in full-resolution coordinates
+            with scheduler.measure('detect'):
+                boxes = mediapipe_face_boxes(self.face_detection, frame, self.detection_width)
+            
+            # The scheduler skips inference on some frames when the frame budget is exceeded
+            infer_this_frame = bool(boxes) and scheduler.should_infer()
             
-            # Detect faces
-            results = self.face_detection.process(rgb_frame)
+            # Give every face a stable id; each id has its own window, emotionCache and emotionScore
+            timestamp = captured.timestamp
+            tracks = self.face_identities.update(boxes, timestamp)
             
-            if results.detections:
-                self.debug_info = f"Face detected! Frame: {frame_count}"
+            # Extract the full-resolution face regions
+            regions = []
+            for bbox in boxes:
+                x, y = max(0, bbox[0]), max(0, bbox[1])
+                regions.append(frame[y:bbox[1]+bbox[3], x:bbox[0]+bbox[2]].copy())
+            
+            # Run the emotion model once for all faces that need a new result; the others
+            # hold their last result between inferences
+            pending = [i for i, region in enumerate(regions)
+                       if region.size > 0 and (infer_this_frame or tracks[i].state.last_probabilities is None)]
+            model_error = None
+            if pending:
+                try:
+                    with scheduler.measure('infer'):
+                        probabilities = self.classifier.classify_batch([regions[i] for i in pending], timestamp)
+                    for i, face_probabilities in zip(pending, probabilities):
+                        tracks[i].state.last_probabilities = face_probabilities
+                    emotion_detection_count += len(pending)
+                except Exception as e:
+                    model_error = str(e)
+            
+            overlays = []  # (box, label) drawn on the display
+            for i, (bbox, region, track) in enumerate(zip(boxes, regions, tracks)):
+                history = track.state
                 
-                for detection in results.detections:
-                    # Draw face detection box
-                    bboxC = detection.location_data.relative_bounding_box
-                    ih, iw, _ = frame.shape
-                    bbox = int(bboxC.xmin * iw), int(bboxC.ymin * ih), \
-                           int(bboxC.width * iw), int(bboxC.height * ih)
-                    
-                    cv2.rectangle(frame, bbox, (0, 255, 0), 2)
-                    
-                    # Extract face region for emotion detection
-                    face_region = frame[bbox[1]:bbox[1]+bbox[3], bbox[0]:bbox[0]+bbox[2]]
-                    
-                    if face_region.size > 0:
-                        self.debug_info = f"Face region extracted: {face_region.shape}"
-                        
-                        # Detect emotion using DeepFace
-                        try:
-                            self.debug_info = "Starting DeepFace analysis..."
-                            self.root.after(0, self.update_debug_display)
-                            
-                            emotion_result = DeepFace.analyze(face_region, 
-                                                           actions=['emotion'], 
-                                                           enforce_detection=False)
-                            
-                            if isinstance(emotion_result, list):
-                                emotion_result = emotion_result[0]
-                            
-                            emotion = emotion_result['dominant_emotion']
-                            confidence = max(emotion_result['emotion'].values())
-                            
-                            self.current_emotion = emotion.capitalize()
-                            self.emotion_confidence = confidence
-                            emotion_detection_count += 1
-                            
-                            # Update emotion window
-                            self.update_emotion_window(emotion)
-                            
-                            # Record emotion data every 3 seconds
-                            self.record_emotion_data()
-                            
-                            # Get window statistics
-                            window_text, emotion_stats = self.get_window_stats()
-                            
-                            self.debug_info = f"Emotion: {emotion} ({confidence:.1%}) - Detection #{emotion_detection_count} - {window_text}"
-                            
-                            # Update GUI labels
-                            self.root.after(0, lambda: self.update_emotion_display(window_text))
-                            
-                        except Exception as e:
-                            self.debug_info = f"DeepFace error: {str(e)}"
-                            self.current_emotion = "Detection failed"
-                            self.emotion_confidence = 0.0
-                            self.update_emotion_window("Detection failed")
-                            self.record_emotion_data()
-                            window_text, _ = self.get_window_stats()
-                            self.root.after(0, lambda: self.update_emotion_display(window_text))
+                probabilities, status, label = None, None, None
+                if region.size == 0:
+                    status = "Face too small"
+                elif model_error is not None and i in pending:
+                    status = "Detection failed"
+                else:
+                    probabilities = history.last_probabilities
+                    emotion = self.emotions[int(np.argmax(probabilities))]
+                    label = f"#{track.track_id} {emotion}"
+                overlays.append((bbox, label))
+                
+                if self.store_frames and self.session_writer is not None:
+                    if probabilities is not None:
+                        self.session_writer.add_frame(emotion, np.max(probabilities), timestamp, track.track_id)
                     else:
-                        self.debug_info = "Face region is empty or too small"
-                        self.current_emotion = "Face too small"
-                        self.emotion_confidence = 0.0
-                        self.update_emotion_window("Face too small")
-                        self.record_emotion_data()
-                        window_text, _ = self.get_window_stats()
-                        self.root.after(0, lambda: self.update_emotion_display(window_text))
+                        self.session_writer.add_frame(status, 0.0, timestamp, track.track_id)
+                
+                # Feed the face's aggregators; its emotion data is recorded every 3 seconds
+                self.record_emotion_data(track, history.update(probabilities, timestamp, status))
+            
+            # Faces that were not found on this frame count as absent until their track expires
+            for track in self.face_identities.missing(timestamp):
+                self.record_emotion_data(track, track.state.update(None, timestamp, "No face detected"))
+            
+            # The labels show the largest face, or the last one shown while it is still tracked
+            if tracks:
+                largest = max(range(len(boxes)), key=lambda i: boxes[i][2] * boxes[i][3])
+                self.primary_track = tracks[largest]
+            elif self.primary_track is not None:
+                self.primary_track = self.face_identities.get(self.primary_track.track_id)
+            
+            primary = self.primary_track
+            if tracks:
+                emotion, _ = primary.state.emotion_window.latest()
+                probabilities = primary.state.last_probabilities
+                if emotion in self.emotions:
+                    self.current_emotion = emotion.capitalize()
+                    self.emotion_confidence = float(np.max(probabilities))
+                else:
+                    self.current_emotion = emotion
+                    self.emotion_confidence = 0.0
             else:
                 self.current_emotion = "No face detected"
                 self.emotion_confidence = 0.0
-                self.update_emotion_window("No face detected")
-                self.record_emotion_data()
-                window_text, _ = self.get_window_stats()
-                self.debug_info = f"No face detected in frame {frame_count}"
-                self.root.after(0, lambda: self.update_emotion_display(window_text))
             
-            # Update debug display
-            self.root.after(0, self.update_debug_display)
+            window_text, _ = self.get_window_stats(primary)
+            window_text += f" | {self.mood_text(primary)}"
+            if primary is not None:
+                counter_text = f"Face #{primary.track_id} - Counter: {primary.state.counter}/{self.history_length}"
+            else:
+                counter_text = f"Counter: 0/{self.history_length}"
             
-            # Convert frame for GUI display
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
+            if model_error is not None:
+                self.debug_info = f"Emotion model error: {model_error}"
+            elif tracks:
+                ids = ", ".join(f"#{track.track_id}" for track in tracks)
+                self.debug_info = (f"Faces: {ids} ({len(self.face_identities.tracks)} tracked) - "
+                                   f"Detection #{emotion_detection_count} - {window_text}")
+                if cache is not None:
+                    self.debug_info += f" - Cache hits: {cache.hit_rate():.0%}"
+            else:
+                self.debug_info = f"No face detected in frame {frame_count} (dropped: {grabber.frames_dropped})"
             
-            # Resize frame to fit GUI
-            display_width = 640
-            display_height = 480
-            frame_pil = frame_pil.resize((display_width, display_height), Image.Resampling.LANCZOS)
+            # Update GUI labels
+            self.root.after(0, lambda: self.update_emotion_display(window_text, counter_text))
             
-            frame_tk = ImageTk.PhotoImage(frame_pil)
+            # Update debug display
+            self.root.after(0, self.update_debug_display)
             
-            # Update video display
-            self.root.after(0, lambda: self.video_label.config(image=frame_tk))
-            self.root.after(0, lambda: setattr(self.video_label, 'image', frame_tk))
+            # Resize into the display buffer, draw the face boxes on it and update the video display;
+            # skipped while the window is hidden
+            with scheduler.measure('display'):
+                if self.display.prepare(frame) is not None:
+                    for bbox, label in overlays:
+                        self.display.draw_face(bbox, label)
+                    self.display.show()
             
-            # Control frame rate
-            time.sleep(0.1)  # ~10 FPS for better window analysis
+            # Control frame rate (~10 FPS for window analysis) within the CPU budget
+            scheduler.end_frame()
             
-    def update_emotion_display(self, window_text):
+    def update_emotion_display(self, window_text, counter_text):
         """Update emotion and confidence labels in GUI"""
         self.emotion_label.config(text=f"Emotion: {self.current_emotion}")
         self.confidence_label.config(text=f"Confidence: {self.emotion_confidence:.1%}")
         self.window_label.config(text=window_text)
-        self.counter_label.config(text=f"Counter: {self.counter}/20")
+        self.counter_label.config(text=counter_text)
         
     def update_debug_display(self):
         """Update debug information in GUI"""
-        self.debug_label.config(text=f"Debug: {self.debug_info}")
+        self.debug_label.config(text=f"Debug: {self.debug_info}\nScheduler: {self.scheduler.report()}\n"
+                                     f"{self.startup.report()}")
         
     def on_closing(self):
         """Handle window closing"""
         self.stop_camera()
+        
+        # Let the processing thread finish its frame so its last records reach the writers
+        if self.video_thread is not None:
+            self.video_thread.join(timeout=2.0)
+            self.video_thread = None
+        self.log_writer.close()  # Write out queued records
+        if self.session_writer is not None:
+            self.session_writer.close()
         self.root.destroy()
         
     def run(self):
         """Start the GUI application"""
         self.root.mainloop()
 
-def main():
+def main(source=0, record_path=None, backend='keras', model_server=None, store_path=None, store_frames=False, record_frames=DEFAULT_CAPACITY):
     """Main function to run the debug emotion detector"""
     print("Starting Enhanced Emotion Detection System...")
     print("This version uses a 3-second sliding window approach.")
@@ -426,7 +487,8 @@ def main():
     print("EmotionScore is calculated with weighted history.")
     print()
     
-    detector = DebugEmotionDetector()
+    detector = DebugEmotionDetector(source, record_path, record_frames, backend=backend, model_server=model_server,
+                                    store_path=store_path, store_frames=store_frames)
     detector.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+"""
+Emotion Aggregators
+Streaming summaries of a face's per-frame emotion probabilities. Every
+aggregator does a constant amount of work per frame and can be queried at any
+moment; EmotionHistory (the 3-second / 20-record scheme) is one of them.
+"""
+
+import numpy as np
+
+class EmotionAggregator:
+    """Interface for per-face streaming emotion summaries
+
+    update() is called once per frame with the face's probability vector, or
+    with None and a status (e.g. "No face detected") when there is none.
+    scores() returns the current per-emotion summary.
+    """
+
+    def update(self, probabilities, timestamp, status=None):
+        raise NotImplementedError
+
+    def scores(self):
+        raise NotImplementedError
+
+    def dominant(self):
+        """Index of the highest-scoring emotion, or None before any emotion was seen"""
+        scores = self.scores()
+        return int(np.argmax(scores)) if scores.any() else None
+
+class DecayedEmotionAggregator(EmotionAggregator):
+    """Exponentially decayed average of the full probability vectors
+
+    A frame's weight halves every half_life seconds of capture time. Frames
+    without probabilities count as absence, so the scores fade towards zero
+    while the face is missing.
+    """
+
+    def __init__(self, num_emotions=7, half_life=2.0):
+        self.half_life = half_life
+        self.accumulated = np.zeros(num_emotions)
+        self.total_weight = 0.0
+        self.last_timestamp = None
+        self._scores = np.zeros(num_emotions)
+
+    def update(self, probabilities, timestamp, status=None):
+        if self.last_timestamp is not None:
+            decay = 0.5 ** (max(timestamp - self.last_timestamp, 0.0) / self.half_life)
+            self.accumulated *= decay
+            self.total_weight *= decay
+        self.last_timestamp = timestamp
+
+        if probabilities is not None:
+            self.accumulated += probabilities
+        self.total_weight += 1.0
+
+    def scores(self):
+        """Decayed mean probability of each emotion"""
+        if self.total_weight > 0:
+            np.divide(self.accumulated, self.total_weight, out=self._scores)
+        return self._scores
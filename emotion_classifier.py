@@ -0,0 +1,123 @@
+"""
+Emotion Classifier
+Runs DeepFace's emotion model directly on face crops, classifying all faces
+of a frame in a single model invocation.
+"""
+
+import cv2
+import numpy as np
+
+# Output order of the emotion model (same as the detectors' self.emotions)
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+# The emotion model takes 48x48 grayscale faces
+INPUT_SIZE = 48
+
+# Inference backends: DeepFace's float Keras model, or its int8 TFLite conversion
+BACKENDS = ('keras', 'int8')
+
+def load_emotion_model(backend='keras'):
+    """Build DeepFace's emotion model once and return the model for the backend"""
+    if backend == 'int8':
+        from quantized_model import load_quantized_model
+        return load_quantized_model()
+    if backend != 'keras':
+        raise ValueError(f"Unknown emotion backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+    try:
+        # Newer DeepFace versions
+        from deepface.modules import modeling
+        client = modeling.build_model(task="facial_attribute", model_name="Emotion")
+    except (ImportError, TypeError):
+        from deepface import DeepFace
+        client = DeepFace.build_model("Emotion")
+    return getattr(client, 'model', client)
+
+class EmotionClassifier:
+    """Classify BGR face crops into 7-way emotion probabilities without DeepFace.analyze
+
+    Only the steps the model needs are done (resize, grayscale, scale to [0, 1]),
+    into buffers that are allocated once and reused. Probabilities are returned
+    in the order of `labels` (the model's own order by default). With a
+    CropResultCache, crops similar to a recent one reuse its result. The
+    'int8' backend runs the quantized TFLite model instead of the Keras one.
+    """
+
+    def __init__(self, model=None, labels=None, max_batch=8, cache=None, backend='keras'):
+        self.model = model if model is not None else load_emotion_model(backend)
+        self.emotions = list(labels) if labels is not None else list(EMOTIONS)
+        self.cache = cache
+
+        # Column order that maps model outputs onto self.emotions
+        self._order = np.array([EMOTIONS.index(label) for label in self.emotions])
+        self._identity_order = self.emotions == EMOTIONS
+
+        # Reusable preprocessing buffers
+        self._resized = np.empty((INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        self._gray = np.empty((INPUT_SIZE, INPUT_SIZE), dtype=np.uint8)
+        self._batch = np.empty((max_batch, INPUT_SIZE, INPUT_SIZE, 1), dtype=np.float32)
+
+    def preprocess(self, crops):
+        """Fill the reusable (n, 48, 48, 1) float32 tensor with crops scaled to [0, 1]"""
+        if len(crops) > len(self._batch):
+            self._batch = np.empty((len(crops), INPUT_SIZE, INPUT_SIZE, 1), dtype=np.float32)
+        batch = self._batch[:len(crops)]
+
+        for i, crop in enumerate(crops):
+            if crop.ndim == 3:
+                # Resize first so the color conversion only touches 48x48 pixels
+                cv2.resize(crop, (INPUT_SIZE, INPUT_SIZE), dst=self._resized)
+                cv2.cvtColor(self._resized, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            else:
+                cv2.resize(crop, (INPUT_SIZE, INPUT_SIZE), dst=self._gray)
+            np.multiply(self._gray, 1.0 / 255.0, out=batch[i, :, :, 0], casting='unsafe')
+        return batch
+
+    def classify_batch(self, crops, timestamp=None):
+        """Run the model once for all crops and return an (n, 7) array of probabilities
+
+        timestamp is the capture time of the crops' frame; the crop cache ages its
+        entries on it (wall clock when None), so replays hit the cache the same way
+        at any speed.
+        """
+        if len(crops) == 0:
+            return np.zeros((0, len(self.emotions)), dtype=np.float32)
+        if self.cache is not None:
+            return self._classify_cached(crops, timestamp)
+        return self._run_model(crops)
+
+    def _classify_cached(self, crops, timestamp=None):
+        """Serve similar crops from the cache and run the model only on the rest"""
+        results = np.empty((len(crops), len(self.emotions)), dtype=np.float32)
+        signatures = [self.cache.signature(crop) for crop in crops]
+
+        missing = []
+        for i, signature in enumerate(signatures):
+            cached = self.cache.lookup(signature, timestamp)
+            if cached is None:
+                missing.append(i)
+            else:
+                results[i] = cached
+
+        if missing:
+            predictions = self._run_model([crops[i] for i in missing])
+            for i, probabilities in zip(missing, predictions):
+                results[i] = probabilities
+                self.cache.store(signatures[i], probabilities.copy(), timestamp)
+        return results
+
+    def _run_model(self, crops):
+        """Preprocess the crops and run the model on them in one batch"""
+        predictions = np.asarray(self.model.predict_on_batch(self.preprocess(crops)), dtype=np.float32)
+
+        # Normalize each row so the vectors are proper distributions
+        predictions /= np.maximum(predictions.sum(axis=1, keepdims=True), 1e-12)
+        return predictions if self._identity_order else predictions[:, self._order]
+
+    def classify(self, crop):
+        """Classify a single crop and return its probability vector"""
+        return self.classify_batch([crop])[0]
+
+    def warm_up(self):
+        """Run the model once on a blank crop, bypassing the cache"""
+        self._run_model([np.zeros((INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)])
@@ -1,32 +1,84 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import threading
-import time
-from deepface import DeepFace
-import os
+from frame_grabber import FrameGrabber
+from frame_recorder import FrameRecorder, DEFAULT_CAPACITY
+from frame_sources import open_frame_source, describe_source
+from face_tracker import FaceTracker
+from face_search import DETECTION_WIDTH, mediapipe_face_boxes
+from model_loader import StartupTimer, BackgroundLoader, load_emotion_models
+from crop_cache import CropResultCache
+from inference_worker import InferenceWorker
+from frame_scheduler import AdaptiveScheduler
+from frame_display import FrameDisplay
+from face_identities import FaceIdentities
 
 class EmotionDetector:
-    def __init__(self):
-        self.mp_face_detection = mp.solutions.face_detection
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.face_detection = self.mp_face_detection.FaceDetection(
-            model_selection=1, min_detection_confidence=0.5
-        )
+    def __init__(self, source=0, record_path=None, record_frames=DEFAULT_CAPACITY, detect_interval=5, min_track_ratio=0.6,
+                 detection_width=DETECTION_WIDTH, display_fps=30, inference_fps=None, cache_distance=0.1,
+                 cpu_budget=0.8, backend='keras', model_server=None, max_idle=2.0, max_tracks=16):
+        self.startup = StartupTimer()
         
+        # MediaPipe and the emotion model are loaded in the background (see load_models);
+        # backend 'int8' runs the quantized emotion model (see quantized_model.py)
+        self.face_detection = None
+        self.classifier = None
+        self.backend = backend
+        self.model_server = model_server  # Address of a shared model server, None for in-process
+        
+        # Run MediaPipe every detect_interval frames and track faces with optical flow in between;
+        # a full detection is forced when fewer than min_track_ratio of the tracked points survive
+        self.face_tracker = FaceTracker(self.detect_faces, detect_interval=detect_interval,
+                                        min_track_ratio=min_track_ratio)
+        
+        self.source = source  # Camera index or frame source spec (see frame_sources.py)
+        self.record_path = record_path  # Record processed frames here for later replay
+        self.record_frames = record_frames  # Frames the recording can hold
+        self.detection_width = detection_width  # Faces are detected on a copy this wide
         self.cap = None
+        self.grabber = None
         self.is_running = False
+        self.frames_processed = 0
         self.current_emotion = "No face detected"
         self.emotion_confidence = 0.0
         
         # Emotion labels
         self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
         
-        # Create GUI
+        # The emotion model runs on all faces of a frame at a time; crops within cache_distance
+        # of a recent one reuse its result (None disables the cache)
+        self.crop_cache = CropResultCache(max_distance=cache_distance) if cache_distance is not None else None
+        
+        # The display renders at display_fps (within the CPU budget) while the model runs on a
+        # background worker, limited to inference_fps (None runs it as fast as it can)
+        self.scheduler = AdaptiveScheduler(target_fps=display_fps, cpu_budget=cpu_budget)
+        self.inference_worker = InferenceWorker(None, max_rate=inference_fps)
+        self.result_age = None
+        
+        # Every face gets a stable id holding its latest probabilities; faces unseen for
+        # max_idle seconds are dropped and at most max_tracks are kept
+        self.face_identities = FaceIdentities(max_idle=max_idle, max_tracks=max_tracks)
+        self.applied_result = None  # Frame id of the last worker result handed to the faces
+        
+        # Create GUI, then load the models while it comes up
         self.setup_gui()
+        self.models = BackgroundLoader(self.load_models, on_done=self.on_models_loaded).start()
+        
+    def load_models(self):
+        """Import and build MediaPipe and the emotion model and warm them up (loader thread)"""
+        self.face_detection, self.classifier = load_emotion_models(
+            self.startup, self.emotions, cache=self.crop_cache, backend=self.backend,
+            model_server=self.model_server, client_name=type(self).__name__)
+        self.inference_worker.classifier = self.classifier
+        
+    def on_models_loaded(self, result, error):
+        """Report the startup timing once loading has finished"""
+        message = f"Model loading failed: {error}" if error else f"Ready to start - {self.startup.report()}"
+        print(message)
+        if not self.is_running:
+            self.root.after(0, lambda: self.status_label.config(text=message))
         
     def setup_gui(self):
         """Setup the main GUI window"""
@@ -56,6 +108,7 @@ class EmotionDetector:
         
         self.video_label = tk.Label(self.video_frame, bg='#34495e')
         self.video_label.pack(padx=10, pady=10)
+        self.display = FrameDisplay(self.root, self.video_label, 640, 480)
         
         # Emotion display frame
         emotion_frame = tk.Frame(main_frame, bg='#2c3e50')
@@ -71,6 +124,11 @@ class EmotionDetector:
                                          style='Confidence.TLabel')
         self.confidence_label.pack()
         
+        # Display and inference rates
+        self.rate_label = ttk.Label(emotion_frame, text="Display: 0.0 FPS | Inference: 0.0 FPS",
+                                   style='Confidence.TLabel')
+        self.rate_label.pack()
+        
         # Control buttons
         button_frame = tk.Frame(main_frame, bg='#2c3e50')
         button_frame.pack(pady=20)
@@ -88,7 +146,7 @@ class EmotionDetector:
         self.stop_button.pack(side='left', padx=10)
         
         # Status bar
-        self.status_label = tk.Label(main_frame, text="Ready to start", 
+        self.status_label = tk.Label(main_frame, text="Loading models...", 
                                     bg='#34495e', fg='white', font=('Arial', 10))
         self.status_label.pack(pady=10)
         
@@ -98,9 +156,17 @@ class EmotionDetector:
     def start_camera(self):
         """Start the webcam and emotion detection"""
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.source)
             if not self.cap.isOpened():
-                raise Exception("Could not open webcam")
+                raise Exception(f"Could not open {describe_source(self.source)}")
+            
+            # Read frames on a dedicated thread so processing always gets the freshest frame
+            recorder = FrameRecorder(self.record_path, self.record_frames) if self.record_path else None
+            self.grabber = FrameGrabber(self.cap, recorder).start()
+            self.inference_worker.start()
+            
+            # Replays are shown frame by frame at the pace the source sets
+            self.scheduler.set_lossless(self.grabber.lossless)
             
             self.is_running = True
             self.start_button.config(state='disabled')
@@ -118,107 +184,136 @@ class EmotionDetector:
     def stop_camera(self):
         """Stop the webcam and emotion detection"""
         self.is_running = False
-        if self.cap:
+        if self.grabber:
+            # The grabber releases the capture once its thread is out of cap.read()
+            self.grabber.stop(release=True)
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
+        self.inference_worker.stop()
         
         self.start_button.config(state='normal')
         self.stop_button.config(state='disabled')
         self.status_label.config(text="Camera stopped")
         
         # Clear video display
-        self.video_label.config(image='')
+        self.display.clear()
+        
+    def detect_faces(self, frame):
+        """Run MediaPipe face detection on a downscaled copy and return full-resolution pixel boxes"""
+        return mediapipe_face_boxes(self.face_detection, frame, self.detection_width)
         
     def process_video(self):
-        """Process video frames and detect emotions"""
-        frame_count = 0
-        emotion_detection_count = 0
+        """Render every captured frame and hand face crops to the background inference worker"""
+        grabber = self.grabber
+        worker = self.inference_worker
+        scheduler = self.scheduler
+        
+        # Wait for the background model loading started with the GUI
+        if not self.models.ready():
+            self.root.after(0, lambda: self.status_label.config(text="Loading models..."))
+        try:
+            self.models.result()
+        except Exception as e:
+            message = f"Error loading models: {e}"
+            self.root.after(0, lambda: self.status_label.config(text=message))
+            return
+        self.root.after(0, lambda: self.status_label.config(text="Camera started - Detecting emotions..."))
         
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            # Always take the newest captured frame; stale ones are dropped by the grabber
+            captured = grabber.read_latest()
+            if captured is None:
+                if grabber.ended:
+                    # The source has no more frames, e.g. the end of a replay
+                    self.root.after(0, self.stop_camera)
+                    break
                 continue
                 
-            frame_count += 1
+            frame = captured.frame
+            self.frames_processed += 1
+            scheduler.begin_frame()
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             
-            # Convert to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Detect faces
-            results = self.face_detection.process(rgb_frame)
-            
-            if results.detections:
-                for detection in results.detections:
-                    # Draw face detection box
-                    bboxC = detection.location_data.relative_bounding_box
-                    ih, iw, _ = frame.shape
-                    bbox = int(bboxC.xmin * iw), int(bboxC.ymin * ih), \
-                           int(bboxC.width * iw), int(bboxC.height * ih)
-                    
-                    cv2.rectangle(frame, bbox, (0, 255, 0), 2)
-                    
-                    # Extract face region for emotion detection
-                    face_region = frame[bbox[1]:bbox[1]+bbox[3], bbox[0]:bbox[0]+bbox[2]]
-                    
-                    if face_region.size > 0:
-                        # Detect emotion using DeepFace
-                        try:
-                            emotion_result = DeepFace.analyze(face_region, 
-                                                           actions=['emotion'], 
-                                                           enforce_detection=False)
-                            
-                            if isinstance(emotion_result, list):
-                                emotion_result = emotion_result[0]
-                            
-                            emotion = emotion_result['dominant_emotion']
-                            confidence = max(emotion_result['emotion'].values())
-                            
-                            self.current_emotion = emotion.capitalize()
-                            self.emotion_confidence = confidence
-                            emotion_detection_count += 1
-                            
-                            # Update GUI labels
-                            self.root.after(0, self.update_emotion_display)
-                            
-                        except Exception as e:
-                            print(f"Emotion detection error: {e}")
-                            self.current_emotion = "Detection failed"
-                            self.emotion_confidence = 0.0
-                            self.root.after(0, self.update_emotion_display)
-                    else:
-                        self.current_emotion = "Face too small"
-                        self.emotion_confidence = 0.0
-                        self.root.after(0, self.update_emotion_display)
-            else:
+            # Detect faces every few frames, track them in between
+            with scheduler.measure('detect'):
+                boxes = self.face_tracker.update(frame)
+            
+            # Give every face a stable id; each id keeps the latest probabilities computed for it
+            tracks = self.face_identities.update(boxes, captured.timestamp)
+            
+            # Extract the full-resolution face regions
+            faces = []
+            for bbox, track in zip(boxes, tracks):
+                x, y = max(0, bbox[0]), max(0, bbox[1])
+                face_region = frame[y:bbox[1]+bbox[3], x:bbox[0]+bbox[2]].copy()
+                if face_region.size > 0:
+                    faces.append((bbox, face_region, track.track_id))
+            
+            # Hand the crops to the inference worker, which always works on the newest ones
+            if faces:
+                worker.submit(captured.frame_id, captured.timestamp, [bbox for bbox, _, _ in faces],
+                              [face for _, face, _ in faces], [track_id for _, _, track_id in faces])
+            
+            # Hand a new result to the faces it was computed for
+            result = worker.latest()
+            if result is not None and result.frame_id != self.applied_result:
+                self.applied_result = result.frame_id
+                for track_id, probs in zip(result.track_ids, result.probabilities):
+                    track = self.face_identities.get(track_id)
+                    if track is not None:
+                        track.state = probs
+            
+            # Show the emotion of the largest face
+            largest = tracks[max(range(len(boxes)), key=lambda i: boxes[i][2] * boxes[i][3])] if boxes else None
+            if not boxes:
                 self.current_emotion = "No face detected"
                 self.emotion_confidence = 0.0
-                self.root.after(0, self.update_emotion_display)
-            
-            # Convert frame for GUI display
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
+            elif not faces:
+                self.current_emotion = "Face too small"
+                self.emotion_confidence = 0.0
+            elif largest.state is None:
+                self.current_emotion = "Detection failed" if worker.last_error else "Analyzing..."
+                self.emotion_confidence = 0.0
+            else:
+                self.current_emotion = f"{self.emotions[int(np.argmax(largest.state))].capitalize()} (face #{largest.track_id})"
+                self.emotion_confidence = float(np.max(largest.state))
             
-            # Resize frame to fit GUI
-            display_width = 640
-            display_height = 480
-            frame_pil = frame_pil.resize((display_width, display_height), Image.Resampling.LANCZOS)
+            # Age of the shown result: capture time between the frame it was computed on and this frame,
+            # which also holds for replays whose timestamps are from the recording
+            self.result_age = captured.timestamp - result.timestamp if result is not None else None
             
-            frame_tk = ImageTk.PhotoImage(frame_pil)
+            # Update GUI labels
+            self.root.after(0, self.update_emotion_display)
             
-            # Update video display
-            self.root.after(0, lambda: self.video_label.config(image=frame_tk))
-            self.root.after(0, lambda: setattr(self.video_label, 'image', frame_tk))
+            # Resize into the display buffer, overlay each face's emotion on it and update the video
+            # display; skipped while the window is hidden
+            if self.display.prepare(frame) is not None:
+                for bbox, track in zip(boxes, tracks):
+                    label = None
+                    if track.state is not None:
+                        label = f"#{track.track_id} {self.emotions[int(np.argmax(track.state))]}"
+                    self.display.draw_face(bbox, label)
+                self.display.show()
             
-            # Control frame rate
-            time.sleep(0.03)  # ~30 FPS
+            # Control display frame rate within the CPU budget
+            scheduler.end_frame()
             
     def update_emotion_display(self):
         """Update emotion and confidence labels in GUI"""
         self.emotion_label.config(text=f"Emotion: {self.current_emotion}")
         self.confidence_label.config(text=f"Confidence: {self.emotion_confidence:.1%}")
         
+        age_text = f"{self.result_age:.2f}s" if self.result_age is not None else "-"
+        rate_text = (f"Display: {self.scheduler.achieved_fps():.1f} FPS | "
+                     f"Inference: {self.inference_worker.rate():.1f} FPS | "
+                     f"Result age: {age_text}")
+        if self.crop_cache is not None:
+            rate_text += f" | Cache hits: {self.crop_cache.hit_rate():.0%}"
+        self.rate_label.config(text=rate_text)
+        
     def on_closing(self):
         """Handle window closing"""
         self.stop_camera()
@@ -228,12 +323,12 @@ class EmotionDetector:
         """Start the GUI application"""
         self.root.mainloop()
 
-def main():
+def main(source=0, record_path=None, backend='keras', model_server=None, record_frames=DEFAULT_CAPACITY):
     """Main function to run the emotion detector"""
     print("Starting Emotion Detection System...")
     print("Make sure you have a webcam connected and good lighting for best results.")
     
-    detector = EmotionDetector()
+    detector = EmotionDetector(source, record_path, record_frames, backend=backend, model_server=model_server)
     detector.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""
+Emotion History
+The per-face emotion state of the debug detector: a sliding window of recent
+emotions, the emotionCache of presence times recorded every few seconds, and
+the emotionScore computed from it with weighted history.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from emotion_aggregators import EmotionAggregator
+from emotion_window import SlidingEmotionWindow
+
+def default_weight_curve(ages):
+    """Weight of a record that is `ages` records old: 100 falling to 50 over 5 records,
+    then to 25 over the next 5, and 25 from there on"""
+    ages = np.asarray(ages)
+    return np.where(ages <= 5, 100 - 10 * ages, np.where(ages <= 10, 75 - 5 * ages, 25))
+
+def ring_weights(cache_size, weight_curve=default_weight_curve):
+    """Doubled, reversed weight vector for an emotionCache ring of cache_size records
+
+    For a ring whose newest record is at slot c, the weights of slots 0..N-1
+    are the view [N-1-c : 2N-1-c] of this array, so no per-record reordering
+    is needed. The array can be shared by all histories of the same size.
+    """
+    weights = np.asarray(weight_curve(np.arange(cache_size)), dtype=np.float32)[::-1]
+    return np.concatenate([weights, weights])
+
+@lru_cache(maxsize=None)
+def _default_ring_weights(cache_size):
+    weights = ring_weights(cache_size)
+    weights.flags.writeable = False
+    return weights
+
+class EmotionHistory(EmotionAggregator):
+    """Sliding window, emotionCache and emotionScore of one face
+
+    The window only holds the frames of the last window_duration seconds and
+    the cache has a fixed cache_size rows, so a history never grows however
+    long its face stays tracked. weights is a ring_weights() array for
+    cache_size; the default curve is used when it is None. A mood aggregator
+    (e.g. DecayedEmotionAggregator) is fed the same frames, for a smooth
+    reading between records.
+    """
+
+    def __init__(self, emotions, window_duration=3.0, cache_size=20, record_interval=3.0, weights=None,
+                 mood=None):
+        self.emotions = emotions
+        self.window_duration = window_duration
+        self.record_interval = record_interval
+
+        # Sliding window over the last window_duration seconds of capture time
+        self.emotion_window = SlidingEmotionWindow(window_duration)
+
+        # Presence time of each emotion per record_interval, cache_size records in a ring
+        self.counter = 0
+        self.emotionCache = np.zeros((cache_size, len(emotions)), dtype=np.float32)
+        self.emotionScore = np.zeros(len(emotions), dtype=np.float32)
+        self.weights = weights if weights is not None else _default_ring_weights(cache_size)
+        if len(self.weights) != 2 * cache_size:
+            raise ValueError(f"weights are for a cache of {len(self.weights) // 2} records, not {cache_size}")
+        self.last_record_time = None  # Set from the first frame's capture time
+
+        self.mood = mood
+        self.last_probabilities = None  # Latest model output, held between inferences
+
+    def update(self, probabilities, timestamp, status=None):
+        """Add a frame's dominant emotion (or status) to the window and record every record_interval
+
+        Returns the emotionCache slot written on this frame, or None.
+        """
+        emotion = self.emotions[int(np.argmax(probabilities))] if probabilities is not None else status
+        self.update_emotion_window(emotion, timestamp)
+        if self.mood is not None:
+            self.mood.update(probabilities, timestamp, status)
+        return self.record_emotion_data(timestamp)
+
+    def scores(self):
+        """emotionScore as of the last record"""
+        return self.emotionScore
+
+    def update_emotion_window(self, emotion, current_time):
+        """Add an emotion (or a status such as "No face detected") to the sliding window"""
+        self.emotion_window.append(emotion, current_time)
+
+    def calculate_emotion_score(self):
+        """Calculate emotionScore based on weighted history, the newest record being at counter"""
+        cache_size = len(self.emotionCache)
+        start = cache_size - 1 - self.counter
+        # Weights of slots 0..N-1 for the current ring head, as a view
+        np.dot(self.weights[start:start + cache_size], self.emotionCache, out=self.emotionScore)
+
+    def record_emotion_data(self, current_time):
+        """Record the window's presence times every record_interval seconds of capture time
+
+        Returns the emotionCache slot written (emotionScore is recalculated), or None.
+        """
+        if self.last_record_time is None:
+            self.last_record_time = current_time
+        if current_time - self.last_record_time < self.record_interval or not self.emotion_window:
+            return None
+
+        # Presence time of every emotion in the current window
+        window = self.emotion_window
+        for i, emotion in enumerate(self.emotions):
+            self.emotionCache[self.counter, i] = window.fraction(emotion) * self.window_duration
+
+        self.calculate_emotion_score()
+
+        recorded = self.counter
+        self.counter = (self.counter + 1) % len(self.emotionCache)
+        self.last_record_time = current_time
+        return recorded
+
+    def get_window_stats(self):
+        """Window summary text and per-emotion frame counts"""
+        window = self.emotion_window
+        if len(window) == 0:
+            return f"Window: 0/{self.window_duration:.1f}s", {}
+
+        # Dominant emotion and its presence time, from the window's running totals
+        emotion = window.dominant()
+        return (f"Window: {window.presence_time(emotion):.1f}/{window.window_time():.1f}s ({emotion})",
+                window.counts())
@@ -0,0 +1,108 @@
+"""
+Emotion Window
+A sliding window of per-frame emotions that evicts by capture time and keeps
+per-emotion counts and durations up to date on every append and eviction, so
+presence-time and dominant-emotion queries never scan the window.
+"""
+
+from collections import deque
+
+class SlidingEmotionWindow:
+    """Emotions (or statuses such as "No face detected") seen over the last `duration` seconds
+
+    Each entry stands for the time since the previous frame, capped at the
+    window duration, so presence times follow the real frame timing rather
+    than an assumed frame rate. The part of the oldest entry's time that lies
+    before the window start is left out of the totals.
+    """
+
+    def __init__(self, duration=3.0):
+        self.duration = duration
+        self.entries = deque()  # (emotion, timestamp, seconds)
+        self.emotion_counts = {}
+        self.emotion_durations = {}
+        self.total_duration = 0.0
+        self.last_timestamp = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, emotion, timestamp):
+        """Add the emotion of a frame captured at timestamp and evict entries older than the window"""
+        seconds = 0.0
+        if self.last_timestamp is not None:
+            seconds = min(max(timestamp - self.last_timestamp, 0.0), self.duration)
+        self.last_timestamp = timestamp
+
+        self.entries.append((emotion, timestamp, seconds))
+        self.emotion_counts[emotion] = self.emotion_counts.get(emotion, 0) + 1
+        self.emotion_durations[emotion] = self.emotion_durations.get(emotion, 0.0) + seconds
+        self.total_duration += seconds
+
+        self.evict(timestamp)
+
+    def evict(self, now):
+        """Drop entries captured more than `duration` seconds before now"""
+        entries = self.entries
+        while entries and now - entries[0][1] >= self.duration:
+            emotion, _, seconds = entries.popleft()
+            count = self.emotion_counts[emotion] - 1
+            if count:
+                self.emotion_counts[emotion] = count
+                self.emotion_durations[emotion] -= seconds
+            else:
+                del self.emotion_counts[emotion]
+                del self.emotion_durations[emotion]
+            self.total_duration -= seconds
+
+        if not entries:
+            self.total_duration = 0.0  # Clear accumulated rounding error
+
+    def _overhang(self):
+        """(emotion, seconds) of the oldest entry's time that lies before the window start"""
+        if not self.entries:
+            return None, 0.0
+        emotion, timestamp, seconds = self.entries[0]
+        window_start = self.last_timestamp - self.duration
+        return emotion, max(seconds - (timestamp - window_start), 0.0)
+
+    def window_time(self):
+        """Seconds of capture time covered by the window"""
+        return max(self.total_duration - self._overhang()[1], 0.0)
+
+    def count(self, emotion):
+        """Number of frames with this emotion in the window"""
+        return self.emotion_counts.get(emotion, 0)
+
+    def presence_time(self, emotion):
+        """Seconds of the window during which this emotion was seen"""
+        oldest, overhang = self._overhang()
+        seconds = self.emotion_durations.get(emotion, 0.0) - (overhang if emotion == oldest else 0.0)
+        return max(seconds, 0.0)
+
+    def fraction(self, emotion):
+        """Share of the window taken by this emotion, by time (by frames until time has passed)"""
+        window_time = self.window_time()
+        if window_time > 0:
+            return self.presence_time(emotion) / window_time
+        return self.count(emotion) / len(self.entries) if self.entries else 0.0
+
+    def dominant(self):
+        """The emotion with the most presence time (most frames until time has passed), or None"""
+        if not self.entries:
+            return None
+        # One key per distinct emotion or status, a handful at most
+        if self.window_time() > 0:
+            return max(self.emotion_durations, key=self.presence_time)
+        return max(self.emotion_counts, key=self.emotion_counts.get)
+
+    def latest(self):
+        """(emotion, timestamp) of the newest entry, or None"""
+        if not self.entries:
+            return None
+        emotion, timestamp, _ = self.entries[-1]
+        return emotion, timestamp
+
+    def counts(self):
+        """Copy of the per-emotion frame counts"""
+        return dict(self.emotion_counts)
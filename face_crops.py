@@ -0,0 +1,31 @@
+"""
+Face Crops
+Loads face crops for benchmarking and calibrating the emotion model, from a
+directory of images or as seeded synthetic faces.
+"""
+
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from frame_sources import SyntheticFrameSource
+
+def load_crops(directory=None, count=50, seed=0):
+    """Load face crops from a directory, or generate synthetic ones of varying size"""
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, '*')))
+        crops = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+        if not crops:
+            raise IOError(f"No images found in {directory}")
+        return crops[:count]
+
+    rng = np.random.RandomState(seed)
+    crops = []
+    for i in range(count):
+        size = int(rng.randint(80, 260))
+        face = SyntheticFrameSource._draw_face(size, smile=bool(i % 2))
+        noise = rng.randint(-20, 20, face.shape)
+        crops.append((face.astype(np.int16) + noise).clip(0, 255).astype(np.uint8))
+    return crops
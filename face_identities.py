@@ -0,0 +1,113 @@
+"""
+Face Identities
+Assigns stable ids to face boxes across frames by matching each frame's boxes
+to the known tracks on overlap (IoU), so per-face state such as emotion windows
+follows the same person. Tracks not seen for a while are expired.
+"""
+
+import numpy as np
+
+class FaceTrack:
+    """One tracked face: its id, last box and timestamp, and per-face state"""
+
+    __slots__ = ('track_id', 'box', 'first_seen', 'last_seen', 'state')
+
+    def __init__(self, track_id, box, timestamp, state=None):
+        self.track_id = track_id
+        self.box = box
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.state = state
+
+def iou_matrix(boxes_a, boxes_b):
+    """Intersection over union of every (x, y, w, h) box in boxes_a with every box in boxes_b"""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    left = np.maximum(a[:, None, 0], b[None, :, 0])
+    top = np.maximum(a[:, None, 1], b[None, :, 1])
+    right = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    bottom = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+class FaceIdentities:
+    """Match face boxes to tracks with stable ids
+
+    Boxes are matched greedily to the track they overlap most, if the IoU is at
+    least min_iou; unmatched boxes start new tracks. Tracks unseen for more than
+    max_idle seconds are dropped, and at most max_tracks are kept (the least
+    recently seen go first). state_factory(track_id) creates each track's state.
+    """
+
+    def __init__(self, min_iou=0.3, max_idle=2.0, max_tracks=16, state_factory=None):
+        self.min_iou = min_iou
+        self.max_idle = max_idle
+        self.max_tracks = max_tracks
+        self.state_factory = state_factory
+
+        self.tracks = {}  # track_id -> FaceTrack
+        self.next_id = 1
+
+        # Counters
+        self.tracks_created = 0
+        self.tracks_expired = 0
+
+    def update(self, boxes, timestamp):
+        """Assign the boxes of one frame to tracks and return the matched FaceTracks in box order"""
+        tracks = list(self.tracks.values())
+        assigned = [None] * len(boxes)
+
+        if tracks and boxes:
+            overlaps = iou_matrix(boxes, [track.box for track in tracks])
+            # Greedy matching, best overlaps first
+            used = set()
+            for flat in np.argsort(overlaps, axis=None)[::-1]:
+                box_index, track_index = np.unravel_index(flat, overlaps.shape)
+                if overlaps[box_index, track_index] < self.min_iou:
+                    break
+                if assigned[box_index] is None and track_index not in used:
+                    assigned[box_index] = tracks[track_index]
+                    used.add(track_index)
+
+        for i, box in enumerate(boxes):
+            track = assigned[i]
+            if track is None:
+                track = self._create(box, timestamp)
+                assigned[i] = track
+            track.box = tuple(box)
+            track.last_seen = timestamp
+
+        self.expire(timestamp)
+        return assigned
+
+    def _create(self, box, timestamp):
+        track_id = self.next_id
+        self.next_id += 1
+        self.tracks_created += 1
+        state = self.state_factory(track_id) if self.state_factory else None
+        track = FaceTrack(track_id, tuple(box), timestamp, state)
+        self.tracks[track_id] = track
+        return track
+
+    def expire(self, timestamp):
+        """Drop idle tracks, then the least recently seen ones beyond max_tracks"""
+        for track_id in [tid for tid, track in self.tracks.items() if timestamp - track.last_seen > self.max_idle]:
+            del self.tracks[track_id]
+            self.tracks_expired += 1
+
+        if len(self.tracks) > self.max_tracks:
+            by_age = sorted(self.tracks.values(), key=lambda track: track.last_seen)
+            for track in by_age[:len(self.tracks) - self.max_tracks]:
+                del self.tracks[track.track_id]
+                self.tracks_expired += 1
+
+    def missing(self, timestamp):
+        """Tracks that were not seen on the frame at timestamp but have not expired yet"""
+        return [track for track in self.tracks.values() if track.last_seen < timestamp]
+
+    def get(self, track_id):
+        """The live track with this id, or None"""
+        return self.tracks.get(track_id)
@@ -0,0 +1,118 @@
+"""
+Face Search
+Helpers for running face detection on a downscaled copy of the frame while
+keeping boxes (and therefore face crops) in full-resolution coordinates.
+"""
+
+import cv2
+
+# Default width of the copy face detection runs on
+DETECTION_WIDTH = 640
+
+def downscale(image, detection_width=DETECTION_WIDTH):
+    """Return a copy no wider than detection_width and the scale factor that was applied"""
+    height, width = image.shape[:2]
+    if not detection_width or width <= detection_width:
+        return image, 1.0
+
+    scale = detection_width / float(width)
+    small = cv2.resize(image, (detection_width, max(1, int(round(height * scale)))),
+                       interpolation=cv2.INTER_AREA)
+    return small, scale
+
+def scale_boxes(boxes, scale):
+    """Map (x, y, w, h) boxes found on a downscaled image back to full resolution"""
+    return [tuple(int(round(v / scale)) for v in box) for box in boxes]
+
+def mediapipe_face_boxes(face_detection, frame, detection_width=DETECTION_WIDTH):
+    """Run MediaPipe on a downscaled copy of a BGR frame and return full-resolution pixel boxes"""
+    small, _ = downscale(frame, detection_width)
+
+    # Convert to RGB for MediaPipe
+    rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    results = face_detection.process(rgb_small)
+
+    boxes = []
+    if results.detections:
+        # MediaPipe boxes are relative, so they apply to the full frame directly
+        ih, iw = frame.shape[:2]
+        for detection in results.detections:
+            bboxC = detection.location_data.relative_bounding_box
+            boxes.append((int(bboxC.xmin * iw), int(bboxC.ymin * ih),
+                          int(bboxC.width * iw), int(bboxC.height * ih)))
+    return boxes
+
+class RoiFaceSearch:
+    """Find the largest face with a Haar cascade, searching only around the previous face
+
+    Between periodic full-frame scans the cascade only runs on the previous face box
+    expanded by roi_margin, and only at scales close to the previous face size.
+    A full scan also runs whenever the restricted search misses.
+    full_scan_interval=1 scans the full frame every time.
+    """
+
+    def __init__(self, face_cascade, detection_width=DETECTION_WIDTH, full_scan_interval=15,
+                 roi_margin=0.5, size_range=(0.75, 1.33), scale_factor=1.1, min_neighbors=4):
+        self.face_cascade = face_cascade
+        self.detection_width = detection_width
+        self.full_scan_interval = max(1, full_scan_interval)
+        self.roi_margin = roi_margin
+        self.size_range = size_range
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+        self.last_face = None  # Last face in detection-image coordinates
+        self.frames_since_full_scan = 0
+
+        # Counters
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def _largest(self, faces):
+        return max(faces, key=lambda face: face[2] * face[3]) if len(faces) > 0 else None
+
+    def _full_scan(self, gray):
+        self.full_scans += 1
+        self.frames_since_full_scan = 0
+        faces = self.face_cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        return self._largest(faces)
+
+    def _roi_scan(self, gray):
+        self.roi_scans += 1
+        self.frames_since_full_scan += 1
+        ih, iw = gray.shape[:2]
+        x, y, w, h = self.last_face
+
+        # Expanded region around the previous face
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(iw, x + w + mx), min(ih, y + h + my)
+
+        # Narrow scale range around the previous face size
+        size = max(w, h)
+        min_size = int(size * self.size_range[0])
+        max_size = min(int(size * self.size_range[1]), x1 - x0, y1 - y0)
+        if max_size <= min_size:
+            return None
+
+        faces = self.face_cascade.detectMultiScale(gray[y0:y1, x0:x1], self.scale_factor, self.min_neighbors,
+                                                   minSize=(min_size, min_size), maxSize=(max_size, max_size))
+        face = self._largest(faces)
+        if face is None:
+            return None
+        fx, fy, fw, fh = face
+        return (fx + x0, fy + y0, fw, fh)
+
+    def find_faces(self, frame):
+        """Return a list holding the largest face in full-resolution coordinates (or an empty list)"""
+        small, scale = downscale(frame, self.detection_width)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        face = None
+        if self.last_face is not None and self.frames_since_full_scan < self.full_scan_interval - 1:
+            face = self._roi_scan(gray)
+        if face is None:
+            face = self._full_scan(gray)
+
+        self.last_face = tuple(int(v) for v in face) if face is not None else None
+        return scale_boxes([self.last_face], scale) if face is not None else []
@@ -0,0 +1,111 @@
+"""
+Face Tracker
+Runs a full face detector only every few frames and follows the detected boxes
+with sparse optical flow in between.
+"""
+
+import cv2
+import numpy as np
+
+class FaceTracker:
+    """Detect faces every N frames and track them with Lucas-Kanade optical flow in between"""
+
+    def __init__(self, detect_fn, detect_interval=5, min_track_ratio=0.6, max_points=40):
+        self.detect_fn = detect_fn  # frame -> list of (x, y, w, h) boxes
+        self.detect_interval = max(1, detect_interval)
+        self.min_track_ratio = min_track_ratio  # Re-detect when fewer points than this survive
+        self.max_points = max_points
+
+        self.prev_gray = None
+        self.tracks = []  # List of (box, points) with points as float32 (n, 1, 2)
+        self.frames_since_detection = 0
+
+        # Counters
+        self.detections_run = 0
+        self.frames_tracked = 0
+
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+    def reset(self):
+        """Forget all tracks so the next frame runs a full detection"""
+        self.prev_gray = None
+        self.tracks = []
+
+    def _features_in_box(self, gray, box):
+        """Find good features to track inside a box"""
+        x, y, w, h = box
+        mask = np.zeros_like(gray)
+        mask[max(0, y):y+h, max(0, x):x+w] = 255
+        points = cv2.goodFeaturesToTrack(gray, maxCorners=self.max_points, qualityLevel=0.01,
+                                         minDistance=5, mask=mask)
+        return points
+
+    def _detect(self, frame, gray):
+        """Run the full detector and seed new tracks"""
+        self.detections_run += 1
+        self.frames_since_detection = 0
+        self.tracks = []
+        boxes = self.detect_fn(frame)
+        for box in boxes:
+            points = self._features_in_box(gray, box)
+            self.tracks.append((tuple(int(v) for v in box), points))
+        return [box for box, _ in self.tracks]
+
+    def _track(self, gray):
+        """Move every box by the optical flow of its points; None if tracking is unreliable"""
+        ih, iw = gray.shape[:2]
+        tracks = []
+        for box, points in self.tracks:
+            if points is None or len(points) < 3:
+                return None
+
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.lk_params)
+            if new_points is None:
+                return None
+            good = status.reshape(-1) == 1
+            if good.mean() < self.min_track_ratio:
+                return None
+
+            old_good = points[good].reshape(-1, 2)
+            new_good = new_points[good].reshape(-1, 2)
+
+            # Translation from the median displacement, scale from the spread around the centroid
+            shift = np.median(new_good - old_good, axis=0)
+            old_spread = np.linalg.norm(old_good - old_good.mean(axis=0), axis=1)
+            new_spread = np.linalg.norm(new_good - new_good.mean(axis=0), axis=1)
+            valid = old_spread > 1e-3
+            scale = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+
+            x, y, w, h = box
+            cx, cy = x + w / 2.0 + shift[0], y + h / 2.0 + shift[1]
+            w, h = w * scale, h * scale
+            x, y = int(round(cx - w / 2.0)), int(round(cy - h / 2.0))
+            w, h = int(round(w)), int(round(h))
+
+            # Give up on boxes that drift out of the frame
+            if w <= 0 or h <= 0 or x + w <= 0 or y + h <= 0 or x >= iw or y >= ih:
+                return None
+
+            tracks.append(((x, y, w, h), new_good.reshape(-1, 1, 2)))
+        return tracks
+
+    def update(self, frame):
+        """Return the face boxes for this frame, detecting or tracking as needed"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Between detections, track existing faces (an empty frame stays empty until the next detection)
+        tracks = None
+        if self.prev_gray is not None and self.frames_since_detection < self.detect_interval - 1:
+            tracks = self._track(gray)
+
+        if tracks is None:
+            boxes = self._detect(frame, gray)
+        else:
+            self.tracks = tracks
+            self.frames_since_detection += 1
+            self.frames_tracked += 1
+            boxes = [box for box, _ in tracks]
+
+        self.prev_gray = gray
+        return boxes
@@ -0,0 +1,118 @@
+"""
+Frame Display
+Shows processed frames in a Tk label without per-frame allocations: each frame
+is resized once into a preallocated buffer at the display size, overlays are
+drawn on that buffer, and a single PhotoImage is updated in place. Nothing is
+rendered while the window is minimized, withdrawn or fully covered.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+class FrameDisplay:
+    """Render frames into `label` at width x height
+
+    The processing thread calls prepare(frame) to get the display buffer
+    (None while the window is hidden), draws on it (draw_face scales
+    full-resolution boxes), then calls show(). Frames shown faster than Tk
+    paints them replace each other, so at most one paint is ever queued.
+    """
+
+    def __init__(self, root, label, width, height, interpolation=cv2.INTER_LINEAR):
+        self.root = root
+        self.label = label
+        self.width = width
+        self.height = height
+        self.interpolation = interpolation
+
+        # The processing thread draws into the back buffer; Tk paints the front one
+        self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self._back = np.zeros((height, width, 3), dtype=np.uint8)
+        self._front = np.zeros((height, width, 3), dtype=np.uint8)
+        self._lock = threading.Lock()
+        self._paint_pending = False
+        self._photo = None  # Created on the Tk thread at the first paint
+        self._attached = False
+        self._cleared = False
+        self.scale_x = self.scale_y = 1.0
+
+        # Visibility, kept up to date by Tk events
+        self.mapped = True
+        self.obscured = False
+        root.bind('<Map>', self._on_map, add='+')
+        root.bind('<Unmap>', self._on_unmap, add='+')
+        label.bind('<Visibility>', self._on_visibility, add='+')
+
+        # Counters
+        self.frames_shown = 0
+        self.frames_skipped = 0
+
+    @property
+    def visible(self):
+        return self.mapped and not self.obscured
+
+    def prepare(self, frame):
+        """Resize a BGR frame into the display buffer and return it, or None while hidden"""
+        if not self.visible:
+            self.frames_skipped += 1
+            return None
+        height, width = frame.shape[:2]
+        self.scale_x, self.scale_y = self.width / width, self.height / height
+        cv2.resize(frame, (self.width, self.height), dst=self.buffer, interpolation=self.interpolation)
+        return self.buffer
+
+    def draw_face(self, bbox, label=None, color=(0, 255, 0)):
+        """Draw a full-resolution (x, y, w, h) face box, and a label above it, on the display buffer"""
+        x, y = int(bbox[0] * self.scale_x), int(bbox[1] * self.scale_y)
+        w, h = int(bbox[2] * self.scale_x), int(bbox[3] * self.scale_y)
+        cv2.rectangle(self.buffer, (x, y), (x + w, y + h), color, 2)
+        if label:
+            cv2.putText(self.buffer, label, (x, max(0, y - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    def show(self):
+        """Hand the display buffer to Tk; it is painted on the Tk thread"""
+        cv2.cvtColor(self.buffer, cv2.COLOR_BGR2RGB, dst=self._back)
+        with self._lock:
+            self._back, self._front = self._front, self._back
+            schedule = not self._paint_pending
+            self._paint_pending = True
+            self._cleared = False
+        self.frames_shown += 1
+        if schedule:
+            self.root.after(0, self._paint)
+
+    def clear(self):
+        """Blank the label; the next shown frame brings the image back"""
+        with self._lock:
+            self._cleared = True
+        self.label.config(image='')
+        self._attached = False
+
+    def _paint(self):
+        with self._lock:
+            self._paint_pending = False
+            if self._cleared:
+                return  # A frame shown before clear()
+            image = Image.frombuffer('RGB', (self.width, self.height), self._front, 'raw', 'RGB', 0, 1)
+            if self._photo is None:
+                self._photo = ImageTk.PhotoImage(image)
+            else:
+                self._photo.paste(image)
+        if not self._attached:
+            self.label.config(image=self._photo)
+            self.label.image = self._photo
+            self._attached = True
+
+    def _on_map(self, event):
+        if event.widget is self.root:
+            self.mapped = True
+
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self.mapped = False
+
+    def _on_visibility(self, event):
+        self.obscured = event.state == 'VisibilityFullyObscured'
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import namedtuple
+
+# A captured frame together with its sequence number and capture time
+CapturedFrame = namedtuple('CapturedFrame', ['frame_id', 'timestamp', 'frame'])
+
+class FrameGrabber:
+    """Read frames from a capture on a dedicated thread into a latest-frame slot"""
+
+    def __init__(self, cap, recorder=None):
+        self.cap = cap
+        self.recorder = recorder  # Optional FrameRecorder for the frames handed out
+        self._record_lock = threading.Lock()
+
+        # Sources such as recording replays must not lose frames; the capture
+        # thread then waits for each frame to be consumed instead of overwriting it
+        self.lossless = getattr(cap, 'lossless', False)
+
+        # Recording sessions and replays run inference at a fixed stride, so a replay
+        # makes the same inference decisions as the session it was recorded from
+        self.pinned_stride = recorder.stride if recorder is not None else getattr(cap, 'stride', None)
+
+        # Latest-frame slot, guarded by a condition so readers can wait for new frames
+        self._condition = threading.Condition()
+        self._latest = None
+        self._last_returned_id = 0
+
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0  # Frames overwritten before anyone read them
+        self.read_failures = 0
+
+        # Set when the source has no more frames (a finished replay or video, a closed capture)
+        self.ended = False
+
+        self.is_running = False
+        self._thread = None
+
+        # The capture may only be released once the capture thread is out of cap.read()
+        self._release_lock = threading.Lock()
+        self._capture_done = True
+        self._release_on_exit = False
+
+    def start(self):
+        """Start the capture thread"""
+        self.is_running = True
+        self._capture_done = False
+        self._thread = threading.Thread(target=self._capture_loop)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self, release=False):
+        """Stop the capture thread and wake up any waiting reader
+
+        With release, the capture is released too: right away if the capture
+        thread has exited, otherwise by the thread itself once its last
+        cap.read() returns.
+        """
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+        if release:
+            with self._release_lock:
+                if self._capture_done:
+                    self.cap.release()
+                else:
+                    self._release_on_exit = True
+
+        # Finish the recording; the lock makes sure no frame is being appended
+        with self._record_lock:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+
+    def _capture_loop(self):
+        """Run the capture thread, releasing the capture on exit if stop() asked for it"""
+        try:
+            self._capture_frames()
+        finally:
+            with self._release_lock:
+                self._capture_done = True
+                if self._release_on_exit:
+                    self.cap.release()
+
+    def _capture_frames(self):
+        """Continuously read frames so the capture buffer never backs up"""
+        while self.is_running:
+            if self.lossless:
+                with self._condition:
+                    while self.is_running and self._latest is not None and \
+                            self._latest.frame_id != self._last_returned_id:
+                        self._condition.wait(0.1)
+
+            ret, frame = self.cap.read()
+
+            # Prefer the source's own capture time (e.g. a replayed recording)
+            timestamp = getattr(self.cap, 'last_timestamp', None) or time.time()
+
+            if not ret:
+                self.read_failures += 1
+                if getattr(self.cap, 'finished', False) or not self.cap.isOpened():
+                    # End of stream: wake the reader, which still gets the last unread frame
+                    with self._condition:
+                        self.ended = True
+                        self._condition.notify_all()
+                    break
+                time.sleep(0.005)
+                continue
+
+            with self._condition:
+                self.frames_captured += 1
+
+                # Count the previous frame as dropped if it was never read
+                if self._latest is not None and self._latest.frame_id != self._last_returned_id:
+                    self.frames_dropped += 1
+
+                self._latest = CapturedFrame(self.frames_captured, timestamp, frame)
+                self._condition.notify_all()
+
+    def read_latest(self, timeout=1.0):
+        """Wait for a frame newer than the last one returned and return it as a CapturedFrame"""
+        deadline = time.time() + timeout
+        with self._condition:
+            while self.is_running and not self.ended and (self._latest is None or
+                                                          self._latest.frame_id == self._last_returned_id):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+            if not self.is_running or self._latest is None or self._latest.frame_id == self._last_returned_id:
+                return None
+
+            captured = self._latest
+            self._last_returned_id = captured.frame_id
+            self._condition.notify_all()
+
+        # Record exactly the frames the processing loop sees so replays reproduce it
+        with self._record_lock:
+            if self.recorder is not None:
+                self.recorder.append(captured.frame, captured.timestamp)
+        return captured
+
+    def read(self, timeout=1.0):
+        """Drop-in replacement for cv2.VideoCapture.read() returning the freshest frame"""
+        captured = self.read_latest(timeout)
+        if captured is None:
+            return False, None
+        return True, captured.frame
+
+    def get_stats(self):
+        """Return capture counters for display or logging"""
+        latest = self._latest
+        return {
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'failures': self.read_failures,
+            'latest_frame_id': latest.frame_id if latest else 0,
+            'latest_age': time.time() - latest.timestamp if latest else 0.0,
+        }
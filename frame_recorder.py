@@ -0,0 +1,173 @@
+"""
+Frame Recorder
+Records raw frames and their capture timestamps into a preallocated memory-mapped
+file, and replays them as a frame source yielding zero-copy NumPy views.
+
+File layout:
+  header     64 bytes (see HEADER_DTYPE)
+  index      float64 capture timestamp per frame slot
+  frames     uint8 [capacity, height, width, channels], starting at a 64-byte boundary
+"""
+
+import time
+
+import numpy as np
+
+from frame_sources import FrameSource
+
+MAGIC = b'CEFRAMES'
+VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('width', '<u4'),
+    ('height', '<u4'),
+    ('channels', '<u4'),
+    ('capacity', '<u4'),
+    ('count', '<u4'),
+    ('stride', '<u4'),  # Inference stride pinned while recording; 0 in older recordings means 1
+    ('reserved', 'V28'),
+])
+
+def _layout(capacity):
+    """Byte offsets of the timestamp index and the frame data"""
+    index_offset = HEADER_DTYPE.itemsize
+    frames_offset = index_offset + 8 * capacity
+    frames_offset = (frames_offset + 63) // 64 * 64
+    return index_offset, frames_offset
+
+# Frames a recording holds unless told otherwise (--record-frames)
+DEFAULT_CAPACITY = 3000
+
+class FrameRecorder:
+    """Append frames into a preallocated memory-mapped recording file
+
+    The detector runs inference on every `stride`th frame while recording, and
+    replays of the file use the same stride.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, stride=1):
+        self.path = path
+        self.capacity = capacity
+        self.stride = stride
+        self.count = 0
+        self.frames_skipped = 0  # Frames that did not fit into the file
+
+        # The file is allocated on the first frame, once the frame size is known
+        self._header = None
+        self._timestamps = None
+        self._frames = None
+
+    def _allocate(self, frame):
+        """Create the recording file sized for `capacity` frames of this shape"""
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        index_offset, frames_offset = _layout(self.capacity)
+        frame_shape = (self.capacity, height, width, channels)
+
+        total_size = frames_offset + int(np.prod(frame_shape))
+        with open(self.path, 'wb') as f:
+            # Sparse preallocation; blocks are only written as frames arrive
+            f.truncate(total_size)
+
+        self._header = np.memmap(self.path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+        self._header[0] = (MAGIC, VERSION, width, height, channels, self.capacity, 0, self.stride, b'')
+        self._timestamps = np.memmap(self.path, dtype='<f8', mode='r+',
+                                     offset=index_offset, shape=(self.capacity,))
+        self._frames = np.memmap(self.path, dtype=np.uint8, mode='r+',
+                                 offset=frames_offset, shape=frame_shape)
+
+    def append(self, frame, timestamp=None):
+        """Copy a frame into the next slot; returns False once the file is full"""
+        if self._frames is None:
+            self._allocate(frame)
+
+        if self.count >= self.capacity:
+            if self.frames_skipped == 0:
+                print(f"Warning: recording {self.path} is full after {self.capacity} frames; "
+                      f"later frames are not recorded (use --record-frames to record more)")
+            self.frames_skipped += 1
+            return False
+
+        self._frames[self.count] = frame.reshape(self._frames.shape[1:])
+        self._timestamps[self.count] = time.time() if timestamp is None else timestamp
+        self.count += 1
+
+        # Publish the new count last so a reader never sees a half-written frame
+        self._header['count'] = self.count
+        return True
+
+    def close(self):
+        """Flush the recording and trim the unused preallocated space"""
+        if self._frames is None:
+            return
+
+        frame_size = int(np.prod(self._frames.shape[1:]))
+        _, frames_offset = _layout(self.capacity)
+
+        self._frames.flush()
+        self._timestamps.flush()
+        self._header.flush()
+        self._header = self._timestamps = self._frames = None
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(frames_offset + self.count * frame_size)
+
+class ReplayFrameSource(FrameSource):
+    """Replay a recording as zero-copy frame views at original or accelerated timing
+
+    speed=1.0 replays at the recorded timing, speed=2.0 twice as fast and
+    speed=0 as fast as the consumer can process frames.
+    """
+
+    # Every recorded frame must reach the processing loop for replays to be reproducible
+    lossless = True
+
+    def __init__(self, path, speed=1.0, loop=False):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header[0]['magic'] != MAGIC:
+            raise IOError(f"Not a frame recording: {path}")
+        header = header[0]
+
+        index_offset, frames_offset = _layout(int(header['capacity']))
+        self.count = int(header['count'])
+        self.width = int(header['width'])
+        self.height = int(header['height'])
+        channels = int(header['channels'])
+        self.stride = int(header['stride']) or 1  # Inference stride of the recorded session
+
+        self.timestamps = np.memmap(path, dtype='<f8', mode='r', offset=index_offset, shape=(self.count,))
+        self.frames = np.memmap(path, dtype=np.uint8, mode='r', offset=frames_offset,
+                                shape=(self.count, self.height, self.width, channels))
+
+        # Recorded frame rate, for callers that ask for CAP_PROP_FPS
+        duration = self.timestamps[-1] - self.timestamps[0] if self.count > 1 else 0.0
+        fps = (self.count - 1) / duration if duration > 0 else 30.0
+
+        super().__init__(fps, realtime=speed > 0)
+        self.speed = speed
+        self.loop = loop
+        self.opened = self.count > 0
+        self.last_timestamp = None
+        self._replay_start = None
+
+    def _wait_for_next_frame(self):
+        """Sleep until the recorded time of the next frame, scaled by the replay speed"""
+        if not self.realtime:
+            return
+        index = self.frame_index % self.count
+        if self._replay_start is None or index == 0:
+            self._replay_start = time.time()
+        target = self._replay_start + (self.timestamps[index] - self.timestamps[0]) / self.speed
+        delay = target - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _next_frame(self):
+        if self.frame_index >= self.count and not self.loop:
+            return None
+        index = self.frame_index % self.count
+        self.last_timestamp = float(self.timestamps[index])
+        frame = self.frames[index]
+        return frame[:, :, 0] if frame.shape[2] == 1 else frame
@@ -0,0 +1,127 @@
+"""
+Frame Scheduler
+Paces a detector's processing loop to a target analysis rate and CPU budget,
+replacing fixed time.sleep throttles. It measures the cost of each stage and
+adapts how often inference runs (the inference stride) to stay within budget.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+from inference_worker import RateMeter
+
+class AdaptiveScheduler:
+    """Adaptive loop pacing and inference stride control
+
+    Per frame call begin_frame(), wrap stages in measure(name), ask should_infer()
+    before running inference (measured as the 'infer' stage) and finish with
+    end_frame(), which sleeps for whatever is left of the frame budget.
+    """
+
+    def __init__(self, target_fps=10.0, cpu_budget=0.8, max_stride=8, smoothing=0.2):
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget  # Fraction of wall time the loop may keep a core busy
+        self.max_stride = max_stride
+        self.smoothing = smoothing
+
+        self.stride = 1
+        self.pinned_stride = None  # Fixed stride that overrides adaptation, e.g. while recording
+        self.lossless = False
+        self.stage_costs = {}  # Smoothed seconds per stage
+        self.frame_cost = 0.0  # Smoothed busy seconds per frame, excluding inference
+
+        self._frame_start = None
+        self._frame_stages = {}
+        self._frames_since_inference = 0
+
+        self.frame_meter = RateMeter()
+        self.inference_meter = RateMeter()
+
+    def set_lossless(self, lossless):
+        """Process frames without sleeping, for sources that set their own pace (e.g. replays)"""
+        self.lossless = lossless
+
+    def pin_stride(self, stride):
+        """Run inference on every `stride`th frame regardless of cost; None adapts again"""
+        self.pinned_stride = stride
+        self.stride = stride or 1
+        self._frames_since_inference = 0
+
+    def _smooth(self, previous, value):
+        return value if previous is None else previous + self.smoothing * (value - previous)
+
+    def begin_frame(self):
+        """Mark the start of a frame"""
+        self._frame_start = time.perf_counter()
+        self._frame_stages = {}
+
+    @contextmanager
+    def measure(self, stage):
+        """Measure the cost of a stage of the current frame"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cost = time.perf_counter() - start
+            self._frame_stages[stage] = self._frame_stages.get(stage, 0.0) + cost
+            self.stage_costs[stage] = self._smooth(self.stage_costs.get(stage), cost)
+
+    def should_infer(self):
+        """Whether inference should run on this frame, given the current stride"""
+        self._frames_since_inference += 1
+        if self._frames_since_inference >= self.stride:
+            self._frames_since_inference = 0
+            self.inference_meter.tick()
+            return True
+        return False
+
+    def _update_stride(self):
+        """Pick the smallest stride that keeps the average frame cost within budget"""
+        if self.pinned_stride:
+            self.stride = self.pinned_stride
+            return
+
+        infer_cost = self.stage_costs.get('infer', 0.0)
+        budget = self.cpu_budget / self.target_fps
+        available = budget - self.frame_cost
+
+        if infer_cost <= 0.0 or infer_cost <= available:
+            self.stride = 1
+        elif available <= 0.0:
+            self.stride = self.max_stride
+        else:
+            self.stride = max(1, min(self.max_stride, int(math.ceil(infer_cost / available))))
+
+    def end_frame(self):
+        """Finish the frame: adapt the stride and sleep for the rest of the frame budget"""
+        if self._frame_start is None:
+            return 0.0
+
+        busy = time.perf_counter() - self._frame_start
+        base_cost = busy - self._frame_stages.get('infer', 0.0)
+        self.frame_cost = self._smooth(self.frame_cost if self.frame_meter.events else None, base_cost)
+        self._update_stride()
+
+        # Sleep until the next frame is due, and long enough to keep within the CPU budget
+        delay = max(1.0 / self.target_fps - busy, busy * (1.0 / self.cpu_budget - 1.0))
+        if delay > 0 and not self.lossless:
+            time.sleep(delay)
+
+        self.frame_meter.tick()
+        self._frame_start = None
+        return delay
+
+    def achieved_fps(self):
+        """Frames per second actually processed"""
+        return self.frame_meter.rate()
+
+    def inference_fps(self):
+        """Inferences per second actually run"""
+        return self.inference_meter.rate()
+
+    def report(self):
+        """One-line summary of achieved rates and stage costs"""
+        stages = ", ".join(f"{name} {cost * 1000:.0f}ms" for name, cost in sorted(self.stage_costs.items()))
+        return (f"{self.achieved_fps():.1f}/{self.target_fps:g} FPS, inference {self.inference_fps():.1f}/s "
+                f"(every {self.stride} frames), {stages}")
@@ -0,0 +1,231 @@
+"""
+Frame Sources
+Camera-free replacements for cv2.VideoCapture used for testing and benchmarking.
+Every source implements the subset of the VideoCapture interface the detectors use:
+isOpened(), read(), get() and release().
+"""
+
+import glob
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+class FrameSource:
+    """Base class for VideoCapture-like frame sources"""
+
+    def __init__(self, fps=30.0, realtime=True):
+        self.fps = float(fps)
+        self.realtime = realtime
+        self.frame_index = 0
+        self.opened = True
+        self.finished = False  # Set once a non-looping source has no more frames
+        self.last_timestamp = None  # Capture time of the last frame, if the source knows it
+        self._next_frame_time = None
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
+
+    def get(self, prop):
+        """Answer the VideoCapture properties callers commonly ask for"""
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.frame_index
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return getattr(self, 'width', 0)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return getattr(self, 'height', 0)
+        return 0.0
+
+    def _wait_for_next_frame(self):
+        """Pace reads to the source frame rate, like a real camera would"""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.time()
+        if self._next_frame_time is None:
+            self._next_frame_time = now
+        delay = self._next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        # Do not try to catch up after a stall, just like a camera
+        self._next_frame_time = max(self._next_frame_time, now) + 1.0 / self.fps
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        self._wait_for_next_frame()
+        frame = self._next_frame()
+        if frame is None:
+            self.finished = True
+            return False, None
+        self.frame_index += 1
+        return True, frame
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+class SyntheticFrameSource(FrameSource):
+    """Generate deterministic frames with faces moving across a static background"""
+
+    def __init__(self, width=640, height=480, fps=30.0, num_faces=1, face_images=None,
+                 face_size=160, seed=0, realtime=True):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.num_faces = num_faces
+        self.face_size = face_size
+
+        rng = np.random.RandomState(seed)
+
+        # Static textured background so detectors have something to reject
+        noise = rng.randint(0, 40, (height, width, 3), dtype=np.uint8)
+        gradient = np.linspace(60, 120, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+        self.background = (gradient + noise).clip(0, 255).astype(np.uint8)
+
+        # Faces to paste, either loaded from disk or drawn
+        if face_images:
+            faces = [cv2.imread(path) for path in face_images]
+            faces = [face for face in faces if face is not None]
+            if not faces:
+                raise IOError("Could not load any of the given face images")
+        else:
+            faces = [self._draw_face(face_size, smile) for smile in (True, False)]
+        self.faces = [cv2.resize(face, (face_size, face_size)) for face in faces]
+
+        # Deterministic motion parameters per face
+        self.paths = [(rng.uniform(0.2, 0.6), rng.uniform(0.2, 0.6), rng.uniform(0, 2 * math.pi))
+                      for _ in range(num_faces)]
+
+    @staticmethod
+    def _draw_face(size, smile=True):
+        """Draw a simple cartoon face on a square image"""
+        face = np.full((size, size, 3), 90, dtype=np.uint8)
+        center = (size // 2, size // 2)
+        cv2.ellipse(face, center, (int(size * 0.38), int(size * 0.47)), 0, 0, 360, (140, 170, 215), -1)
+
+        # Eyes
+        for ex in (int(size * 0.35), int(size * 0.65)):
+            cv2.circle(face, (ex, int(size * 0.40)), max(2, size // 16), (40, 40, 40), -1)
+
+        # Eyebrows
+        for ex in (int(size * 0.35), int(size * 0.65)):
+            cv2.line(face, (ex - size // 12, int(size * 0.30)), (ex + size // 12, int(size * 0.30)),
+                     (50, 50, 50), max(1, size // 40))
+
+        # Mouth
+        mouth_center = (size // 2, int(size * 0.68))
+        if smile:
+            cv2.ellipse(face, mouth_center, (size // 6, size // 12), 0, 0, 180, (40, 40, 120), max(2, size // 30))
+        else:
+            cv2.line(face, (size // 2 - size // 7, int(size * 0.70)), (size // 2 + size // 7, int(size * 0.70)),
+                     (40, 40, 120), max(2, size // 30))
+        return face
+
+    def _next_frame(self):
+        frame = self.background.copy()
+        t = self.frame_index / self.fps
+
+        max_x = max(0, self.width - self.face_size)
+        max_y = max(0, self.height - self.face_size)
+        for i, (fx, fy, phase) in enumerate(self.paths):
+            # Move each face along its own Lissajous curve
+            x = int((math.sin(t * fx * 2 * math.pi + phase) + 1) / 2 * max_x)
+            y = int((math.sin(t * fy * 2 * math.pi + phase * 0.5) + 1) / 2 * max_y)
+
+            face = self.faces[(i + self.frame_index // int(max(1, self.fps * 2))) % len(self.faces)]
+            h, w = face.shape[:2]
+            h, w = min(h, self.height - y), min(w, self.width - x)
+            frame[y:y+h, x:x+w] = face[:h, :w]
+        return frame
+
+class ImageDirectorySource(FrameSource):
+    """Play the images of a directory in sorted order, optionally looping"""
+
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+    def __init__(self, directory, fps=30.0, loop=True, realtime=True):
+        super().__init__(fps, realtime)
+        self.loop = loop
+
+        paths = sorted(path for path in glob.glob(os.path.join(directory, '*'))
+                       if path.lower().endswith(self.IMAGE_EXTENSIONS))
+
+        # Decode everything up front so playback cost does not include disk reads
+        self.images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+        if not self.images:
+            self.opened = False
+        else:
+            self.height, self.width = self.images[0].shape[:2]
+
+    def _next_frame(self):
+        if self.frame_index >= len(self.images) and not self.loop:
+            return None
+        return self.images[self.frame_index % len(self.images)].copy()
+
+class VideoFileSource(FrameSource):
+    """Play a video file, paced at its own frame rate and optionally looping"""
+
+    def __init__(self, path, loop=False, realtime=True):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.loop = loop
+        self.opened = self.cap.isOpened()
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            # Rewind and try again
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+def open_frame_source(source=0):
+    """Open a frame source from a camera index or a source spec string
+
+    Supported specs:
+      0, 1, ...                      camera index
+      synthetic[:WIDTHxHEIGHT[@FPS]]  generated frames with moving faces
+      images:DIRECTORY               looped image directory
+      video:PATH                     video file (looped)
+      replay:PATH[@SPEED]            frame recording (see frame_recorder.py),
+                                     SPEED 0 replays as fast as possible
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source))
+
+    kind, _, argument = str(source).partition(':')
+    if kind == 'synthetic':
+        width, height, fps = 640, 480, 30.0
+        if argument:
+            size, _, rate = argument.partition('@')
+            width, height = (int(value) for value in size.lower().split('x'))
+            fps = float(rate) if rate else fps
+        return SyntheticFrameSource(width=width, height=height, fps=fps)
+    if kind == 'images':
+        return ImageDirectorySource(argument)
+    if kind == 'video':
+        return VideoFileSource(argument, loop=True)
+    if kind == 'replay':
+        from frame_recorder import ReplayFrameSource
+        path, _, speed = argument.partition('@')
+        return ReplayFrameSource(path, speed=float(speed) if speed else 1.0)
+
+    raise ValueError(f"Unknown frame source: {source}")
+
+def describe_source(source):
+    """Human readable name of a frame source for status messages"""
+    if isinstance(source, int) or str(source).isdigit():
+        return "webcam" if int(source) == 0 else f"camera {source}"
+    return f"frame source '{source}'"
@@ -0,0 +1,83 @@
+"""
+Heuristic Emotions
+The brightness/contrast emotion heuristic of the simple detectors, vectorized
+so many faces are classified at once: brightness and contrast of all boxes of
+a frame come from one integral image, and the thresholds are applied to arrays.
+"""
+
+import cv2
+import numpy as np
+
+def classify_statistics(brightness, contrast):
+    """Apply the heuristic thresholds to arrays of brightness (mean) and contrast (std)
+
+    Returns (labels, confidences): an array of emotion names and a float64 array.
+    """
+    brightness = np.asarray(brightness, dtype=np.float64)
+    contrast = np.asarray(contrast, dtype=np.float64)
+
+    bright = brightness > 120
+    happy = bright & (contrast > 30)
+    sad = ~bright & (brightness < 80)
+
+    labels = np.where(happy, "Happy", np.where(sad, "Sad", "Neutral"))
+    confidences = np.select(
+        [happy, bright, sad],
+        [np.minimum(0.8, (brightness - 100) / 50), 0.6, np.minimum(0.7, (80 - brightness) / 40)],
+        default=0.5)
+    return labels, confidences
+
+def _slice_end(end, start, size):
+    """Stop index of a [start:end] slice: a negative end counts from the far edge, as in Python"""
+    end = np.clip(np.where(end < 0, end + size, end), 0, size)
+    return np.maximum(end, start)  # An end before the start is an empty slice
+
+def box_statistics(gray, boxes):
+    """Mean and standard deviation of a grayscale image inside each (x, y, w, h) box
+
+    Boxes are clipped to the image the way the detectors' frame[max(0, y):y+h,
+    max(0, x):x+w] crops clip them. Returns (brightness, contrast, areas)
+    arrays; empty boxes have area 0.
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    height, width = gray.shape[:2]
+
+    x1 = np.clip(boxes[:, 0], 0, width)
+    y1 = np.clip(boxes[:, 1], 0, height)
+    x2 = _slice_end(boxes[:, 0] + boxes[:, 2], x1, width)
+    y2 = _slice_end(boxes[:, 1] + boxes[:, 3], y1, height)
+    areas = (x2 - x1) * (y2 - y1)
+    if len(boxes) == 0:
+        return np.zeros(0), np.zeros(0), areas
+
+    # One pass over the region spanned by the boxes gives the sum and squared sum of any rectangle
+    left, top = int(x1.min()), int(y1.min())
+    sums, squared_sums = cv2.integral2(gray[top:int(y2.max()), left:int(x2.max())])
+    x1, x2, y1, y2 = x1 - left, x2 - left, y1 - top, y2 - top
+
+    def rectangle_sums(table):
+        # Corner values are integers, exact in float64
+        corner = lambda y, x: table[y, x].astype(np.float64)
+        return corner(y2, x2) - corner(y1, x2) - corner(y2, x1) + corner(y1, x1)
+
+    count = np.maximum(areas, 1).astype(np.float64)
+    total = rectangle_sums(sums)
+    brightness = total / count
+    # Pixel values are integers, so n * sum(x^2) - sum(x)^2 is exact in float64 for face-sized boxes
+    variance = np.maximum(count * rectangle_sums(squared_sums) - total * total, 0.0) / (count * count)
+    return brightness, np.sqrt(variance), areas
+
+def classify_boxes(frame, boxes):
+    """Classify every face box of a BGR (or grayscale) frame in one pass
+
+    Returns (labels, confidences) arrays in box order; boxes with no pixels
+    inside the frame get "Unknown" and 0.0 like the scalar version.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    brightness, contrast, areas = box_statistics(gray, boxes)
+    labels, confidences = classify_statistics(brightness, contrast)
+
+    empty = areas == 0
+    labels = np.where(empty, "Unknown", labels)
+    confidences[empty] = 0.0
+    return labels, confidences
@@ -0,0 +1,124 @@
+"""
+Inference Worker
+Runs the emotion classifier on a background thread so the display loop never
+waits for the model. The worker always works on the newest submitted face crops.
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+# Result of one classifier run, tagged with the frame (and face track ids) it came from
+InferenceResult = namedtuple('InferenceResult', ['frame_id', 'timestamp', 'boxes', 'probabilities', 'finished_at',
+                                                 'track_ids'])
+
+class RateMeter:
+    """Measure an event rate over a short sliding time window"""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self.events = deque()
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        self.events.append(now)
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+
+    def rate(self):
+        """Events per second over the window"""
+        if len(self.events) < 2:
+            return 0.0
+        span = self.events[-1] - self.events[0]
+        return (len(self.events) - 1) / span if span > 0 else 0.0
+
+class InferenceWorker:
+    """Classify the newest submitted face crops on a background thread"""
+
+    def __init__(self, classifier, max_rate=None):
+        self.classifier = classifier
+        self.max_rate = max_rate  # Maximum inferences per second, None for as fast as possible
+
+        self._condition = threading.Condition()
+        self._pending = None  # (frame_id, timestamp, boxes, crops, track_ids)
+        self._result = None
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.skipped = 0  # Submissions replaced by a newer one before they were processed
+        self.errors = 0
+        self.last_error = None
+        self.rate_meter = RateMeter()
+
+        self.is_running = False
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread"""
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the worker thread"""
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def submit(self, frame_id, timestamp, boxes, crops, track_ids=None):
+        """Queue crops for classification, replacing any submission not yet started"""
+        with self._condition:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = (frame_id, timestamp, boxes, crops, track_ids)
+            self.submitted += 1
+            self._condition.notify()
+
+    def latest(self):
+        """Most recent InferenceResult, or None before the first one"""
+        return self._result
+
+    def rate(self):
+        """Achieved inferences per second"""
+        return self.rate_meter.rate()
+
+    def _run(self):
+        """Worker loop: take the newest submission, classify it, publish the result"""
+        last_start = 0.0
+        while self.is_running:
+            with self._condition:
+                while self.is_running and self._pending is None:
+                    self._condition.wait(0.5)
+                if not self.is_running:
+                    break
+
+            # Respect the configured inference rate; newer submissions may arrive meanwhile
+            if self.max_rate:
+                delay = last_start + 1.0 / self.max_rate - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            with self._condition:
+                pending, self._pending = self._pending, None
+            if pending is None:
+                continue
+
+            frame_id, timestamp, boxes, crops, track_ids = pending
+            last_start = time.time()
+            try:
+                probabilities = self.classifier.classify_batch(crops, timestamp)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                continue
+
+            finished_at = time.time()
+            self._result = InferenceResult(frame_id, timestamp, boxes, probabilities, finished_at, track_ids)
+            self.completed += 1
+            self.rate_meter.tick(finished_at)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Emotion Log Columns
+Converts emotionLog.txt files (the lines written by the debug detector's
+log_emotion_scores, plain or gzip-rotated) into a compact columnar format and
+summarizes them with vectorized NumPy: per-interval rollups with the dominant
+emotion, overall summaries and time-range slices.
+
+A converted log is a directory of raw little-endian arrays that are memory-
+mapped for queries, so only the rows a query touches are read:
+
+    timestamps.i8   int64 seconds since 1970-01-01 in the log's local time
+    faces.i4        int32 face id, -1 for lines written without one
+    scores.f4       float32 (rows, 7) emotionScores
+    meta.json       row count, emotion order, sources; written last
+"""
+
+import argparse
+import gzip
+import json
+import multiprocessing as mp
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+# Emotion labels, in the order of the score columns
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 32 * 1024 * 1024
+
+# Named rollup intervals, in seconds
+INTERVALS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Bulk parsing turns a line such as
+#   2024-05-01 12:00:03 face:2 angry:0.0 disgust:0.0 ... neutral:41.5
+# into whitespace-separated numbers by deleting the letters and blanking the separators
+_NUMBERS_ONLY = bytes.maketrans(b'-:', b'  ')
+_LETTERS = bytes(range(ord('a'), ord('z') + 1)) + bytes(range(ord('A'), ord('Z') + 1))
+
+# Per-line fallback for chunks that do not have the regular layout
+_LINE = re.compile(rb'^(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)(?: face:(\d+))?'
+                   + b''.join(rb' ' + e.encode() + rb':([0-9.]+)' for e in EMOTIONS) + rb'\s*$')
+
+def local_seconds(years, months, days, hours, minutes, seconds):
+    """Seconds since 1970-01-01 of wall-clock dates and times, as int64"""
+    dates = (np.asarray(years, dtype=np.int64) - 1970).astype('datetime64[Y]')
+    dates = dates.astype('datetime64[M]') + (np.asarray(months, dtype=np.int64) - 1)
+    dates = dates.astype('datetime64[D]') + (np.asarray(days, dtype=np.int64) - 1)
+    clock = (np.asarray(hours, dtype=np.int64) * 3600 + np.asarray(minutes, dtype=np.int64) * 60
+             + np.asarray(seconds, dtype=np.int64))
+    return dates.astype('datetime64[s]').astype(np.int64) + clock
+
+def _parse_lines(data):
+    """Parse line by line, skipping lines that do not match; returns (timestamps, faces, scores, skipped)"""
+    rows, skipped = [], 0
+    for line in data.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            skipped += bool(line.strip())
+            continue
+        rows.append([float(group) if group is not None else -1.0 for group in match.groups()])
+    if not rows:
+        return np.zeros(0, np.int64), np.zeros(0, np.int32), np.zeros((0, len(EMOTIONS)), np.float32), skipped
+    values = np.array(rows)
+    return (local_seconds(*values[:, :6].T), values[:, 6].astype(np.int32),
+            values[:, 7:].astype(np.float32), skipped)
+
+def _one_decimal(data, count):
+    """Whether data has exactly count decimal points, each followed by exactly one digit"""
+    chars = np.frombuffer(data, dtype=np.uint8)
+    after = np.flatnonzero(chars == ord('.')) + 2
+    if len(after) != count or (count and after[-1] >= len(chars)):
+        return False
+    return bool(np.all((chars[after - 1] - ord('0') < 10) & (chars[after] - ord('0') >= 10)))
+
+def parse_chunk(data):
+    """Parse whole log lines; returns (timestamps, faces, scores, skipped lines)
+
+    Chunks whose lines all have the regular layout (with or without a face
+    token) are parsed in one vectorized pass; anything else falls back to
+    line-by-line parsing. Scores written with one decimal, as
+    log_emotion_scores does, are read as integer tenths, which is much faster
+    than parsing floats.
+    """
+    lines = data.count(b'\n') + (not data.endswith(b'\n') and bool(data.strip()))
+    if lines == 0:
+        return _parse_lines(b'')
+
+    tenths = _one_decimal(data, len(EMOTIONS) * lines)
+    if tenths:
+        values = np.fromstring(data.translate(_NUMBERS_ONLY, _LETTERS + b'.'), dtype=np.int64, sep=' ')
+    else:
+        values = np.fromstring(data.translate(_NUMBERS_ONLY, _LETTERS), dtype=np.float64, sep=' ')
+
+    for width, has_face in ((7 + len(EMOTIONS), True), (6 + len(EMOTIONS), False)):
+        if values.size != width * lines:
+            continue
+        values = values.reshape(lines, width)
+        date = values[:, :6]
+        # Guard against malformed lines that happen to add up to the right count
+        if (np.all(date == np.floor(date)) and np.all((date[:, 1] >= 1) & (date[:, 1] <= 12))
+                and np.all((date[:, 2] >= 1) & (date[:, 2] <= 31)) and np.all(date[:, 3:] < 61)):
+            faces = values[:, 6].astype(np.int32) if has_face else np.full(lines, -1, dtype=np.int32)
+            scores = values[:, width - len(EMOTIONS):]
+            scores = (scores / 10 if tenths else scores).astype(np.float32)
+            return local_seconds(*date.T), faces, scores, 0
+        break
+
+    return _parse_lines(data)
+
+def _open_log(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield blocks of whole lines from a log file (plain or gzip)"""
+    with _open_log(path) as f:
+        remainder = b''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = remainder + block
+            cut = block.rfind(b'\n') + 1
+            if cut == 0:
+                remainder = block
+                continue
+            remainder = block[cut:]
+            yield block[:cut]
+        if remainder:
+            yield remainder
+
+def chunk_ranges(path, chunk_size=CHUNK_SIZE):
+    """(offset, length) ranges of an uncompressed log, each ending at a line boundary"""
+    size = os.path.getsize(path)
+    ranges, offset = [], 0
+    with open(path, 'rb') as f:
+        while offset < size:
+            end = min(offset + chunk_size, size)
+            if end < size:
+                f.seek(end)
+                end += len(f.readline())
+            ranges.append((offset, end - offset))
+            offset = end
+    return ranges
+
+def _parse_range(job):
+    path, offset, length = job
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return parse_chunk(f.read(length))
+
+def parse_log(path, chunk_size=CHUNK_SIZE, pool=None):
+    """Yield parsed chunks of a log file in order; uncompressed logs are parsed by the pool's processes"""
+    if pool is None or path.endswith('.gz'):
+        for block in read_chunks(path, chunk_size):
+            yield parse_chunk(block)
+    else:
+        jobs = [(path, offset, length) for offset, length in chunk_ranges(path, chunk_size)]
+        yield from pool.imap(_parse_range, jobs)
+
+def convert(paths, output_dir, jobs=None, chunk_size=CHUNK_SIZE):
+    """Convert log files, oldest first, into a columnar directory; returns its metadata"""
+    os.makedirs(output_dir, exist_ok=True)
+    meta_path = os.path.join(output_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # The directory is incomplete until meta.json is written again
+
+    jobs = jobs or os.cpu_count() or 1
+    rows, skipped, ordered = 0, 0, True
+    first, last = None, None
+    pool = mp.Pool(jobs) if jobs > 1 else None
+    try:
+        with open(os.path.join(output_dir, 'timestamps.i8'), 'wb') as timestamps_file, \
+                open(os.path.join(output_dir, 'faces.i4'), 'wb') as faces_file, \
+                open(os.path.join(output_dir, 'scores.f4'), 'wb') as scores_file:
+            for path in paths:
+                for timestamps, faces, scores, chunk_skipped in parse_log(path, chunk_size, pool):
+                    skipped += chunk_skipped
+                    if not len(timestamps):
+                        continue
+                    # Queries can binary-search the timestamps if they never go backwards
+                    if ordered and ((last is not None and timestamps[0] < last) or np.any(np.diff(timestamps) < 0)):
+                        ordered = False
+                    first = int(timestamps[0]) if first is None else first
+                    last = int(timestamps[-1])
+                    timestamps.astype('<i8').tofile(timestamps_file)
+                    faces.astype('<i4').tofile(faces_file)
+                    scores.astype('<f4').tofile(scores_file)
+                    rows += len(timestamps)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    meta = {'version': FORMAT_VERSION, 'rows': rows, 'emotions': EMOTIONS, 'sorted': ordered,
+            'first': first, 'last': last, 'skipped_lines': skipped,
+            'sources': [os.path.abspath(path) for path in paths]}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+class EmotionLogColumns:
+    """A converted log, memory-mapped
+
+    Queries take an optional [start, end) range of timestamps (seconds since
+    1970-01-01 in the log's local time, see parse_time) and an optional face id.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar log version: {self.meta['version']}")
+
+        self.path = path
+        self.emotions = self.meta['emotions']
+        self.rows = self.meta['rows']
+        self.sorted = self.meta['sorted']
+        self.timestamps = self._map('timestamps.i8', '<i8', (self.rows,))
+        self.faces = self._map('faces.i4', '<i4', (self.rows,))
+        self.scores = self._map('scores.f4', '<f4', (self.rows, len(self.emotions)))
+
+    def _map(self, name, dtype, shape):
+        if self.rows == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.rows
+
+    def slice(self, start=None, end=None, face=None):
+        """(timestamps, faces, scores) of the rows in the range, as views when the log is sorted"""
+        if self.sorted:
+            lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side='left'))
+            hi = self.rows if end is None else int(np.searchsorted(self.timestamps, end, side='left'))
+            timestamps, faces, scores = self.timestamps[lo:hi], self.faces[lo:hi], self.scores[lo:hi]
+        else:
+            keep = np.ones(self.rows, dtype=bool)
+            if start is not None:
+                keep &= self.timestamps >= start
+            if end is not None:
+                keep &= self.timestamps < end
+            timestamps, faces, scores = self.timestamps[keep], self.faces[keep], self.scores[keep]
+
+        if face is not None:
+            keep = faces == face
+            timestamps, faces, scores = timestamps[keep], faces[keep], scores[keep]
+        return timestamps, faces, scores
+
+    def summary(self, start=None, end=None, face=None):
+        """Row count, per-emotion mean and max, and how often each emotion scored highest"""
+        timestamps, _, scores = self.slice(start, end, face)
+        if not len(timestamps):
+            return {'rows': 0}
+        # An unsorted log's slice is in file order, so its range needs a full min/max
+        first, last = (timestamps[0], timestamps[-1]) if self.sorted else (timestamps.min(), timestamps.max())
+        return {'rows': len(timestamps), 'first': int(first), 'last': int(last),
+                'mean': scores.mean(axis=0, dtype=np.float64), 'max': scores.max(axis=0),
+                'dominant_counts': np.bincount(scores.argmax(axis=1), minlength=len(self.emotions))}
+
+    def rollup(self, interval, start=None, end=None, face=None):
+        """Per-interval rollup: bucket start times, row counts, mean scores and the dominant emotion index
+
+        Buckets are aligned to multiples of interval seconds; empty buckets are left out.
+        """
+        timestamps, _, scores = self.slice(start, end, face)
+        if not len(timestamps):
+            return {'starts': np.zeros(0, np.int64), 'counts': np.zeros(0, np.int64),
+                    'means': np.zeros((0, len(self.emotions))), 'dominant': np.zeros(0, np.int64)}
+        if not self.sorted:
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, scores = timestamps[order], scores[order]
+
+        buckets = timestamps // interval
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        counts = np.diff(np.append(bounds, len(buckets)))
+        means = np.add.reduceat(scores, bounds, axis=0, dtype=np.float64) / counts[:, None]
+        return {'starts': buckets[bounds] * interval, 'counts': counts, 'means': means,
+                'dominant': means.argmax(axis=1)}
+
+def parse_time(text):
+    """Timestamp in the columns' time base from an ISO date/time in the log's local time"""
+    if text is None:
+        return None
+    return int(np.datetime64(datetime.fromisoformat(text), 's').astype(np.int64))
+
+def format_time(timestamp):
+    return str(np.datetime64(int(timestamp), 's')).replace('T', ' ')
+
+def parse_interval(text):
+    return INTERVALS[text] if text in INTERVALS else int(text)
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Convert emotionLog.txt files to a columnar format and summarize them")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    converter = commands.add_parser("convert", help="Convert log files (oldest first) to a columnar directory")
+    converter.add_argument("logs", nargs="+", help="emotionLog.txt files, plain or .gz")
+    converter.add_argument("-o", "--output", required=True, help="Output directory")
+    converter.add_argument("--jobs", type=int, default=None,
+                           help="Parser processes for uncompressed logs (default: one per CPU)")
+
+    for name, description in (("summary", "Summarize a converted log"),
+                              ("rollup", "Mean scores and dominant emotion per interval")):
+        command = commands.add_parser(name, help=description)
+        command.add_argument("columns", help="Columnar directory written by convert")
+        command.add_argument("--start", default=None, help="Start date/time (ISO, log's local time)")
+        command.add_argument("--end", default=None, help="End date/time (ISO, log's local time)")
+        command.add_argument("--face", type=int, default=None, help="Only this face id")
+        if name == "rollup":
+            command.add_argument("--interval", default="hour",
+                                 help="minute, hour, day or a number of seconds (default: hour)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function for the columnar log tool"""
+    args = parse_args(argv)
+
+    if args.command == "convert":
+        meta = convert(args.logs, args.output, args.jobs)
+        print(f"Converted {meta['rows']} rows to {args.output} (skipped {meta['skipped_lines']} lines)")
+        return
+
+    columns = EmotionLogColumns(args.columns)
+    start, end = parse_time(args.start), parse_time(args.end)
+    emotions = columns.emotions
+
+    if args.command == "summary":
+        summary = columns.summary(start, end, args.face)
+        print(f"Rows: {summary['rows']}")
+        if summary['rows']:
+            print(f"From {format_time(summary['first'])} to {format_time(summary['last'])}")
+            print(f"{'emotion':<10}{'mean':>8}{'max':>8}{'dominant':>10}")
+            for i, emotion in enumerate(emotions):
+                print(f"{emotion:<10}{summary['mean'][i]:>8.1f}{summary['max'][i]:>8.1f}"
+                      f"{summary['dominant_counts'][i]:>10}")
+    else:
+        rollup = columns.rollup(parse_interval(args.interval), start, end, args.face)
+        print(f"{'interval':<21}{'rows':>7}  {'dominant':<10}" + "".join(f"{emotion:>10}" for emotion in emotions))
+        for bucket, count, means, dominant in zip(rollup['starts'], rollup['counts'], rollup['means'],
+                                                  rollup['dominant']):
+            print(f"{format_time(bucket):<21}{count:>7}  {emotions[dominant]:<10}"
+                  + "".join(f"{mean:>10.1f}" for mean in means))
+
+if __name__ == "__main__":
+    main()
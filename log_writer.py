@@ -0,0 +1,170 @@
+"""
+Log Writer
+Appends log lines from a background thread in batches, so slow disks never
+stall the frame loop. The log is fsynced on a configurable policy and rotated
+by size or by day, with old segments optionally gzip-compressed.
+"""
+
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import date
+
+from batch_queue import next_batch, stop_writer
+
+# fsync policies: after every batch, at most every fsync_interval seconds, or never
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+class BatchedLogWriter:
+    """Queue log lines and write them to `path` from a background thread
+
+    write() never blocks: lines are queued (up to max_queue, beyond which they
+    are dropped and counted) and written in batches of up to max_batch lines,
+    at least every flush_interval seconds. The file is rotated when it reaches
+    max_bytes (None for no limit) or, with rotate_daily, when the day changes;
+    the newest backup_count rotated segments are kept.
+    """
+
+    def __init__(self, path, max_batch=64, flush_interval=1.0, fsync='interval', fsync_interval=5.0,
+                 max_bytes=10 * 1024 * 1024, rotate_daily=False, backup_count=5, compress=True,
+                 max_queue=10000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync} (expected one of {', '.join(FSYNC_POLICIES)})")
+
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.backup_count = backup_count
+        self.compress = compress
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+        self._file = None
+        self._day = None
+        self._last_fsync = 0.0
+
+        # Counters
+        self.lines_written = 0
+        self.lines_dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, line):
+        """Queue a line (including its newline) for writing; never blocks
+
+        Lines written after close() are counted as dropped.
+        """
+        if self.closed:
+            self.lines_dropped += 1
+            return
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.lines_dropped += 1
+
+    def close(self, timeout=5.0):
+        """Write everything still queued, fsync and close the file"""
+        if self._thread is None:
+            return
+        self.closed = True
+        self.lines_dropped += stop_writer(self._queue, self._thread, timeout)
+        self._thread = None
+
+    def get_stats(self):
+        """Return writer counters for display or logging"""
+        return {'written': self.lines_written, 'dropped': self.lines_dropped, 'batches': self.batches,
+                'rotations': self.rotations, 'errors': self.errors, 'queued': self._queue.qsize()}
+
+    def _run(self):
+        """Writer loop: gather a batch, write it, fsync and rotate as configured"""
+        stopping = False
+        while not stopping:
+            batch, stopping = next_batch(self._queue, self.max_batch, self.flush_interval)
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    self.errors += 1
+                    self.last_error = str(e)
+                    print(f"Error writing to {self.path}: {e}")
+                    self._close_file()
+
+        try:
+            if self._file is not None and self.fsync != 'never':
+                self._file.flush()
+                os.fsync(self._file.fileno())
+        except OSError as e:
+            self.errors += 1
+            self.last_error = str(e)
+        self._close_file()
+
+    def _write_batch(self, batch):
+        if self._needs_rotation():
+            self._rotate()
+        if self._file is None:
+            self._file = open(self.path, 'a')
+            self._day = date.today()
+
+        self._file.write(''.join(batch))
+        self._file.flush()
+        self.lines_written += len(batch)
+        self.batches += 1
+
+        now = time.monotonic()
+        if self.fsync == 'always' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _needs_rotation(self):
+        if self.rotate_daily and self._day is not None and date.today() != self._day:
+            return True
+        if self.max_bytes is None or not os.path.exists(self.path):
+            return False
+        return os.path.getsize(self.path) >= self.max_bytes
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rotate(self):
+        """Move the current file aside as a timestamped segment and prune old segments"""
+        self._close_file()
+        if not os.path.exists(self.path):
+            return
+
+        root, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        segment, n = f"{root}.{stamp}{ext}", 1
+        while os.path.exists(segment) or os.path.exists(segment + '.gz'):
+            segment, n = f"{root}.{stamp}-{n}{ext}", n + 1
+        os.replace(self.path, segment)
+        self.rotations += 1
+
+        if self.compress:
+            with open(segment, 'rb') as source, gzip.open(segment + '.gz', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.remove(segment)
+
+        # Keep only the newest backup_count segments
+        segments = glob.glob(f"{glob.escape(root)}.*{ext}") + glob.glob(f"{glob.escape(root)}.*{ext}.gz")
+        segments.sort(key=os.path.getmtime)
+        for old in segments[:max(len(segments) - self.backup_count, 0)]:
+            os.remove(old)
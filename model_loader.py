@@ -0,0 +1,115 @@
+"""
+Model Loader
+Imports MediaPipe and the emotion model's framework, builds the models and runs
+a warm-up inference on a background thread while the GUI comes up, timing each
+startup phase.
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+class StartupTimer:
+    """Record how long each named startup phase takes"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = []  # (name, seconds) in the order they ran
+        self.ready_after = None  # Seconds from creation until everything was loaded
+
+    @contextmanager
+    def phase(self, name):
+        """Time a startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self):
+        """Mark startup as complete"""
+        self.ready_after = time.perf_counter() - self.started_at
+
+    def report(self):
+        """One-line breakdown of the startup phases"""
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases)
+        if self.ready_after is None:
+            return f"Startup: {phases or 'loading'}..."
+        return f"Startup: {phases}; ready {self.ready_after:.2f}s after launch"
+
+class BackgroundLoader:
+    """Run a loading function once on a background thread and hand out its result"""
+
+    def __init__(self, load_fn, on_done=None):
+        self.load_fn = load_fn
+        self.on_done = on_done  # Called on the loader thread with (result, error)
+        self.result_value = None
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start loading"""
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result_value = self.load_fn()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+        if self.on_done:
+            self.on_done(self.result_value, self.error)
+
+    def ready(self):
+        """Whether loading has finished (successfully or not)"""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for loading to finish and return its result, re-raising a loading error"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Models are still loading")
+        if self.error is not None:
+            raise self.error
+        return self.result_value
+
+def load_emotion_models(timer, labels, cache=None, backend='keras', min_detection_confidence=0.5,
+                        model_server=None, client_name=None):
+    """Build the MediaPipe face detector and the emotion classifier, warmed up
+
+    With a model_server address the emotion model runs in the shared model
+    server process (see model_server.py), or in-process if it is unavailable.
+    Returns (face_detection, classifier).
+    """
+    with timer.phase('imports'):
+        mp = importlib.import_module('mediapipe')
+        if backend == 'keras' and not model_server:
+            # Pulls in TensorFlow, the bulk of the import time
+            importlib.import_module('deepface.DeepFace')
+        from emotion_classifier import EmotionClassifier
+
+    with timer.phase('model build'):
+        face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=1, min_detection_confidence=min_detection_confidence
+        )
+        if model_server:
+            from model_server import RemoteEmotionModel
+            model = RemoteEmotionModel(model_server, backend, client_name)
+            classifier = EmotionClassifier(model=model, labels=labels, cache=cache)
+        else:
+            classifier = EmotionClassifier(labels=labels, cache=cache, backend=backend)
+
+    # Run both models once so the first real frame does not pay for graph setup
+    with timer.phase('first inference'):
+        face_detection.process(np.zeros((240, 320, 3), dtype=np.uint8))
+        classifier.warm_up()
+
+    timer.finish()
+    return face_detection, classifier
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Emotion Model Server
+Holds one copy of the emotion model in a long-lived local process and runs it
+for any number of detector processes, which connect over a Unix domain socket
+(a named pipe on Windows). Clients fall back to in-process inference when the
+server is not available.
+
+The socket lives in a per-user directory that only its owner can access, and
+connections are authenticated with a random key kept in that directory.
+"""
+
+import argparse
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+
+from inference_worker import RateMeter
+
+# Per-user directory for the socket and the authentication key
+if sys.platform == 'win32':
+    RUNTIME_DIR = os.path.join(os.getenv('LOCALAPPDATA', os.path.expanduser('~')), 'cameraemotions')
+elif os.getenv('XDG_RUNTIME_DIR'):
+    RUNTIME_DIR = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'cameraemotions')
+else:
+    RUNTIME_DIR = os.path.join(tempfile.gettempdir(), f'cameraemotions-{os.getuid()}')
+
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = r'\\.\pipe\cameraemotions-model'
+else:
+    DEFAULT_ADDRESS = os.path.join(RUNTIME_DIR, 'model.sock')
+
+# Random key shared by the server and its clients; created by the server
+AUTHKEY_PATH = os.path.join(RUNTIME_DIR, 'authkey')
+
+def _check_private(path, mode):
+    """Refuse a file or directory that is not owned by this user or is accessible to others"""
+    if sys.platform == 'win32':
+        return
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != mode:
+        raise RuntimeError(f"{path} must be owned by this user with mode {mode:o}")
+
+def private_dir(path=RUNTIME_DIR):
+    """Create the per-user runtime directory (mode 0700) if needed and return it"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    _check_private(path, 0o700)
+    return path
+
+def load_authkey(create=False):
+    """Read the server's authentication key; the server creates it (mode 0600) if missing"""
+    private_dir(os.path.dirname(AUTHKEY_PATH))
+    if create and not os.path.exists(AUTHKEY_PATH):
+        # Write under a temporary name so a client never reads a partial key
+        temp_path = f"{AUTHKEY_PATH}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+        os.replace(temp_path, AUTHKEY_PATH)
+    _check_private(AUTHKEY_PATH, 0o600)
+    with open(AUTHKEY_PATH, 'rb') as f:
+        return f.read()
+
+class ClientStats:
+    """Request rate and latency of one connected client"""
+
+    def __init__(self, name, latency_window=200):
+        self.name = name
+        self.requests = 0
+        self.crops = 0
+        self.errors = 0
+        self.request_meter = RateMeter(window=5.0)
+        self.latencies = deque(maxlen=latency_window)  # Recent request latencies in seconds
+
+    def record(self, crops, latency):
+        self.requests += 1
+        self.crops += crops
+        self.request_meter.tick()
+        self.latencies.append(latency)
+
+    def summary(self):
+        """One-line summary for the server's report"""
+        if not self.latencies:
+            return f"{self.name}: no requests"
+        latencies = np.array(self.latencies) * 1000.0
+        return (f"{self.name}: {self.request_meter.rate():.1f} req/s, {self.requests} requests, "
+                f"{self.crops} crops, latency mean {latencies.mean():.1f}ms "
+                f"p95 {np.percentile(latencies, 95):.1f}ms, {self.errors} errors")
+
+class ModelServer:
+    """Serve predict_on_batch calls on one emotion model to local clients
+
+    Clients send preprocessed (n, 48, 48, 1) float32 batches and receive the
+    model's raw (n, 7) output; preprocessing, caching and label order stay in
+    each client's EmotionClassifier. Model calls are serialized with a lock.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, backend='keras', report_interval=10.0, model=None):
+        self.address = address
+        self.backend = backend
+        self.report_interval = report_interval
+        self.model = model
+
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.clients = {}  # Connection number -> ClientStats, including disconnected clients
+        self._next_client = 0
+
+        self.listener = None
+        self.is_running = False
+
+    def start(self):
+        """Load the model and start listening"""
+        if self.model is None:
+            from emotion_classifier import load_emotion_model
+            self.model = load_emotion_model(self.backend)
+        authkey = load_authkey(create=True)
+
+        # A socket file left behind by a server that died is removed; a live server is not replaced
+        if sys.platform != 'win32' and os.path.exists(self.address):
+            if server_available(self.address):
+                raise RuntimeError(f"A model server is already running at {self.address}")
+            os.unlink(self.address)
+
+        self.listener = Listener(self.address, authkey=authkey)
+        self.is_running = True
+        if self.report_interval:
+            reporter = threading.Thread(target=self._report_loop)
+            reporter.daemon = True
+            reporter.start()
+        return self
+
+    def serve_forever(self):
+        """Accept clients until stopped, handling each on its own thread"""
+        while self.is_running:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                if not self.is_running:
+                    break
+                continue  # Failed handshake (e.g. wrong authkey)
+
+            client_thread = threading.Thread(target=self._handle_client, args=(conn,))
+            client_thread.daemon = True
+            client_thread.start()
+
+    def stop(self):
+        """Stop accepting clients"""
+        self.is_running = False
+        if self.listener:
+            self.listener.close()
+            self.listener = None
+
+    def _handle_client(self, conn):
+        """Answer one client's requests until it disconnects"""
+        with self._stats_lock:
+            client_id = self._next_client
+            self._next_client += 1
+        stats = ClientStats(f"client-{client_id}")
+
+        try:
+            while self.is_running:
+                message = conn.recv()
+                kind = message[0]
+
+                if kind == 'hello':
+                    stats.name = f"{message[1]}#{client_id}"
+                    with self._stats_lock:
+                        self.clients[client_id] = stats
+                    conn.send(('ok', self.backend))
+
+                elif kind == 'predict':
+                    start = time.perf_counter()
+                    try:
+                        with self._model_lock:
+                            predictions = np.asarray(self.model.predict_on_batch(message[1]), dtype=np.float32)
+                    except Exception as e:
+                        stats.errors += 1
+                        conn.send(('error', str(e)))
+                        continue
+                    conn.send(('ok', predictions))
+                    stats.record(len(message[1]), time.perf_counter() - start)
+
+                elif kind == 'stats':
+                    conn.send(('ok', self.report()))
+
+                else:
+                    conn.send(('error', f"Unknown request: {kind}"))
+        except (EOFError, OSError):
+            pass  # Client disconnected
+        finally:
+            conn.close()
+
+    def report(self):
+        """Per-client request rates and latencies, one line each"""
+        with self._stats_lock:
+            clients = list(self.clients.values())
+        return "\n".join(stats.summary() for stats in clients) or "No clients"
+
+    def _report_loop(self):
+        while self.is_running:
+            time.sleep(self.report_interval)
+            with self._stats_lock:
+                has_clients = bool(self.clients)
+            if has_clients:
+                print(f"[{time.strftime('%H:%M:%S')}]\n{self.report()}", flush=True)
+
+def server_available(address=DEFAULT_ADDRESS):
+    """Whether a model server answers at address"""
+    try:
+        Client(address, authkey=load_authkey()).close()
+        return True
+    except (OSError, EOFError, RuntimeError):
+        return False
+
+class RemoteEmotionModel:
+    """Stand-in for the Keras model that runs predict_on_batch on the model server
+
+    If the server cannot be reached, or stops answering, the model is loaded
+    in-process and used from then on.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, backend='keras', client_name=None, timeout=5.0):
+        self.address = address
+        self.backend = backend
+        self.client_name = client_name or f"pid-{os.getpid()}"
+        self.timeout = timeout  # Seconds to wait for an answer before falling back
+
+        self.conn = None
+        self.local_model = None
+        self.remote = False
+        self._connect()
+
+    def _connect(self):
+        """Connect and introduce this client, falling back to a local model on failure"""
+        try:
+            self.conn = Client(self.address, authkey=load_authkey())
+            self.conn.send(('hello', self.client_name))
+            server_backend = self._receive()
+        except (OSError, EOFError, RuntimeError) as e:
+            self._fall_back(f"Model server unavailable ({e})")
+            return
+
+        # A server running another backend would give different results than asked for
+        if server_backend != self.backend:
+            self._fall_back(f"Model server at {self.address} runs the {server_backend} backend, not {self.backend}")
+            return
+        self.remote = True
+        print(f"Using emotion model server at {self.address}")
+
+    def _receive(self):
+        if not self.conn.poll(self.timeout):
+            raise RuntimeError("model server did not answer")
+        status, value = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(value)
+        return value
+
+    def _fall_back(self, reason):
+        """Switch to in-process inference"""
+        print(f"{reason}, running the emotion model in-process")
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.remote = False
+        if self.local_model is None:
+            from emotion_classifier import load_emotion_model
+            self.local_model = load_emotion_model(self.backend)
+
+    def predict_on_batch(self, batch):
+        """Return the model's (n, 7) output for an (n, 48, 48, 1) float32 batch"""
+        if self.remote:
+            try:
+                self.conn.send(('predict', np.ascontiguousarray(batch)))
+                return self._receive()
+            except (OSError, EOFError, RuntimeError) as e:
+                self._fall_back(f"Model server request failed ({e})")
+        return self.local_model.predict_on_batch(batch)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Serve the emotion model to local detector processes")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help=f"Socket path (named pipe on Windows) to listen on (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("--backend", choices=('keras', 'int8'), default="keras",
+                        help="Emotion model backend: float Keras model or int8 TFLite (default: keras)")
+    parser.add_argument("--report-interval", type=float, default=10.0,
+                        help="Seconds between per-client statistics reports, 0 to disable (default: 10)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to run the model server"""
+    args = parse_args(argv)
+
+    print(f"Loading {args.backend} emotion model...")
+    server = ModelServer(args.address, args.backend, args.report_interval).start()
+    print(f"Model server listening on {args.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"\nFinal statistics:\n{server.report()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Multi-Camera Emotion Analyzer
+Fans a list of cameras and/or video files out to one worker process per stream
+and merges their results into a single tagged output stream
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import sys
+import time
+
+from emotion_window import SlidingEmotionWindow
+
+# Marker a worker sends when its stream has ended
+STREAM_DONE = 'done'
+
+def parse_source(source):
+    """Interpret numeric sources as camera indices and everything else as file paths"""
+    return int(source) if str(source).isdigit() else source
+
+class StreamState:
+    """Emotion state owned by a single stream worker"""
+
+    def __init__(self, window_duration=3.0):
+        self.current_emotion = "No face detected"
+        self.emotion_confidence = 0.0
+        self.window_duration = window_duration
+        self.emotion_window = SlidingEmotionWindow(window_duration)
+
+    def update(self, faces, timestamp):
+        """Update the current emotion and sliding window from one frame's faces"""
+        detected = [face for face in faces if face.get('emotion')]
+        if detected:
+            # Use the most confident face as the stream's current emotion
+            best = max(detected, key=lambda face: face['confidence'])
+            self.current_emotion = best['emotion']
+            self.emotion_confidence = best['confidence']
+        else:
+            self.current_emotion = "No face detected"
+            self.emotion_confidence = 0.0
+
+        self.emotion_window.append(self.current_emotion, timestamp)
+
+    def window_emotion(self):
+        """Dominant emotion in the sliding window"""
+        return self.emotion_window.dominant()
+
+def _camera_frames(source, stop_event):
+    """Yield (frame_index, timestamp, frame) from a live camera, always the freshest frame"""
+    import cv2
+    from frame_grabber import FrameGrabber
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open camera {source}")
+
+    grabber = FrameGrabber(cap).start()
+    try:
+        while not stop_event.is_set():
+            captured = grabber.read_latest()
+            if captured is None:
+                if grabber.ended:
+                    break
+                continue
+            yield captured.frame_id, captured.timestamp, cv2.flip(captured.frame, 1)
+    finally:
+        grabber.stop(release=True)
+
+def stream_worker(stream_id, source, result_queue, stop_event, stride=1, target_fps=None):
+    """Worker process: owns its own face detector and emotion state for one stream"""
+    from offline_analyzer import OfflineAnalyzer
+
+    try:
+        analyzer = OfflineAnalyzer()
+        state = StreamState()
+
+        if isinstance(source, int):
+            frames = _camera_frames(source, stop_event)
+            results = ((index, timestamp, analyzer.analyze_frame(frame))
+                       for index, timestamp, frame in frames)
+        else:
+            results = ((result['frame'], result['time'], result['faces'])
+                       for result in analyzer.analyze_video(source, stride=stride, target_fps=target_fps))
+
+        for frame_index, timestamp, faces in results:
+            if stop_event.is_set():
+                break
+
+            state.update(faces, timestamp)
+            result_queue.put({
+                'stream': stream_id,
+                'source': source,
+                'frame': frame_index,
+                'time': timestamp,
+                'faces': faces,
+                'emotion': state.current_emotion,
+                'window_emotion': state.window_emotion(),
+            })
+
+    except Exception as e:
+        result_queue.put({'stream': stream_id, 'source': source, 'error': str(e)})
+    finally:
+        result_queue.put((STREAM_DONE, stream_id))
+
+class MultiCameraAnalyzer:
+    def __init__(self, sources, stride=1, target_fps=None):
+        self.sources = [parse_source(source) for source in sources]
+        self.stride = stride
+        self.target_fps = target_fps
+
+        self.result_queue = mp.Queue(maxsize=256)
+        self.stop_event = mp.Event()
+        self.workers = []
+
+    def start(self):
+        """Start one worker process per source"""
+        for stream_id, source in enumerate(self.sources):
+            worker = mp.Process(target=stream_worker,
+                                args=(stream_id, source, self.result_queue, self.stop_event,
+                                      self.stride, self.target_fps))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def results(self):
+        """Yield merged results from all streams until every stream has finished"""
+        active = set(range(len(self.workers)))
+        while active:
+            try:
+                item = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                # Stop waiting for workers that died without reporting
+                active = {i for i in active if self.workers[i].is_alive()}
+                continue
+
+            if isinstance(item, tuple) and item[0] == STREAM_DONE:
+                active.discard(item[1])
+                continue
+            yield item
+
+    def stop(self):
+        """Signal all workers to stop and wait for them"""
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Analyze emotions on several cameras or video files at once")
+    parser.add_argument("sources", nargs="+",
+                        help="Camera indices (e.g. 0 1) and/or video file paths")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="Analyze every Nth frame of video files")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="Target analysis rate for video files (overrides --stride)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Write JSON lines to this file instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to run the multi-camera analyzer"""
+    args = parse_args(argv)
+
+    analyzer = MultiCameraAnalyzer(args.sources, stride=args.stride, target_fps=args.fps).start()
+    output = open(args.output, "w") if args.output else sys.stdout
+
+    results = 0
+    start_time = time.time()
+    try:
+        for result in analyzer.results():
+            output.write(json.dumps(result) + "\n")
+            results += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analyzer.stop()
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.time() - start_time
+    print(f"Collected {results} results from {len(args.sources)} streams in {elapsed:.1f}s",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
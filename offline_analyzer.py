@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Offline Emotion Analyzer
+Runs the MediaPipe + DeepFace emotion model pipeline over recorded video files without a GUI.
+The 'heuristic' backend classifies with the simple detectors' brightness heuristic instead,
+all faces of a frame in one vectorized pass, for quick runs without TensorFlow.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+
+from emotion_classifier import EmotionClassifier, BACKENDS
+from heuristic_emotions import classify_boxes
+
+# Emotion model backends plus the model-free brightness heuristic
+ANALYZER_BACKENDS = BACKENDS + ('heuristic',)
+
+class OfflineAnalyzer:
+    def __init__(self, min_detection_confidence=0.5, backend='keras'):
+        self.mp_face_detection = mp.solutions.face_detection
+        self.face_detection = self.mp_face_detection.FaceDetection(
+            model_selection=1, min_detection_confidence=min_detection_confidence
+        )
+
+        # Emotion labels
+        self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+        # Emotion model, loaded once and run on all faces of a frame at a time
+        self.backend = backend
+        self.classifier = EmotionClassifier(labels=self.emotions, backend=backend) if backend != 'heuristic' else None
+
+    def analyze_frame(self, frame):
+        """Detect faces and emotions in a single BGR frame"""
+        faces = []
+
+        # Convert to RGB for MediaPipe
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        # Detect faces
+        results = self.face_detection.process(rgb_frame)
+        if not results.detections:
+            return faces
+
+        crops = []
+        ih, iw, _ = frame.shape
+        for detection in results.detections:
+            bboxC = detection.location_data.relative_bounding_box
+            left, top = int(bboxC.xmin * iw), int(bboxC.ymin * ih)
+            x, y = min(max(0, left), iw), min(max(0, top), ih)
+            # Clip the box to the frame on every side
+            w = max(0, min(left + int(bboxC.width * iw), iw) - x)
+            h = max(0, min(top + int(bboxC.height * ih), ih) - y)
+
+            face_region = frame[y:y+h, x:x+w]
+            face = {'bbox': [x, y, w, h], 'emotion': None, 'confidence': 0.0}
+            if face_region.size > 0:
+                crops.append((face, face_region))
+            faces.append(face)
+
+        if crops and self.classifier is None:
+            # Brightness heuristic for all faces from one integral image of the frame
+            labels, confidences = classify_boxes(frame, [face['bbox'] for face, _ in crops])
+            for (face, _), label, confidence in zip(crops, labels, confidences):
+                face['emotion'] = str(label).lower()
+                face['confidence'] = float(confidence)
+        elif crops:
+            # Classify all faces of the frame in a single model invocation
+            try:
+                probabilities = self.classifier.classify_batch([crop for _, crop in crops])
+                for (face, _), probs in zip(crops, probabilities):
+                    face['emotion'] = self.emotions[int(probs.argmax())]
+                    face['confidence'] = float(probs.max())
+                    face['scores'] = {emotion: float(p) for emotion, p in zip(self.emotions, probs)}
+
+            except Exception as e:
+                for face, _ in crops:
+                    face['error'] = str(e)
+
+        return faces
+
+    def analyze_video(self, path, stride=1, target_fps=None, start=0.0, end=None):
+        """Yield one result per analyzed frame of a video file"""
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video file: {path}")
+
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+            # A target analysis rate overrides the explicit stride
+            if target_fps:
+                stride = max(1, int(round(fps / target_fps)))
+            stride = max(1, int(stride))
+
+            # Seek to the start offset
+            if start > 0:
+                cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000.0)
+            frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+            while True:
+                timestamp = frame_index / fps
+                if end is not None and timestamp > end:
+                    break
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+
+                yield {
+                    'frame': frame_index,
+                    'time': round(timestamp, 3),
+                    'faces': self.analyze_frame(frame),
+                }
+
+                # Skip frames without decoding them
+                for _ in range(stride - 1):
+                    if not cap.grab():
+                        return
+                frame_index += stride
+        finally:
+            cap.release()
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Analyze emotions in a recorded video file")
+    parser.add_argument("video", help="Path to the video file")
+    parser.add_argument("--stride", type=int, default=1,
+                        help="Analyze every Nth frame (default: 1)")
+    parser.add_argument("--fps", type=float, default=None,
+                        help="Target analysis rate in frames per second (overrides --stride)")
+    parser.add_argument("--start", type=float, default=0.0,
+                        help="Start offset in seconds")
+    parser.add_argument("--end", type=float, default=None,
+                        help="End offset in seconds")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Write JSON lines to this file instead of stdout")
+    parser.add_argument("--backend", choices=ANALYZER_BACKENDS, default="keras",
+                        help="Emotion model backend: float Keras model, int8 TFLite, or the simple detectors' "
+                             "brightness heuristic without a model (default: keras)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to run the offline analyzer"""
+    args = parse_args(argv)
+
+    analyzer = OfflineAnalyzer(backend=args.backend)
+    output = open(args.output, "w") if args.output else sys.stdout
+
+    frames = 0
+    start_time = time.time()
+    try:
+        for result in analyzer.analyze_video(args.video, stride=args.stride, target_fps=args.fps,
+                                             start=args.start, end=args.end):
+            output.write(json.dumps(result) + "\n")
+            frames += 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.time() - start_time
+    print(f"Analyzed {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-6):.1f} FPS)",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Quantized Emotion Model
+Converts DeepFace's emotion model once to an int8-quantized TensorFlow Lite model,
+caches it on disk and runs it with the lightweight TFLite interpreter on the CPU.
+"""
+
+import os
+
+import numpy as np
+
+from face_crops import load_crops
+
+# The converted model is cached next to DeepFace's own weights
+DEFAULT_MODEL_PATH = os.path.join(os.getenv('DEEPFACE_HOME', os.path.expanduser('~')),
+                                  '.deepface', 'weights', 'facial_expression_model_int8.tflite')
+
+# Number of face crops the activation ranges are calibrated on
+CALIBRATION_COUNT = 100
+
+def load_interpreter(model_path, num_threads=None):
+    """Create a TFLite interpreter, preferring the standalone runtimes over full TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+def convert_emotion_model(output_path=DEFAULT_MODEL_PATH, calibration_crops=None):
+    """Quantize the Keras emotion model to int8 and write it to output_path
+
+    Activation ranges are calibrated on calibration_crops (BGR face crops).
+    Without them synthetic faces are used, with a warning, since the ranges
+    they produce fit real faces worse.
+    """
+    import tensorflow as tf
+    from emotion_classifier import EmotionClassifier, load_emotion_model
+
+    model = load_emotion_model()
+    if calibration_crops is None:
+        print("Warning: calibrating the int8 emotion model on synthetic faces, which costs accuracy on real "
+              "faces; convert it from real face crops with run.py --calibration DIR")
+        calibration_crops = load_crops(count=CALIBRATION_COUNT)
+
+    # Feed calibration crops through the same preprocessing used at inference time
+    classifier = EmotionClassifier(model=model)
+
+    def representative_dataset():
+        for crop in calibration_crops:
+            yield [classifier.preprocess([crop]).copy()]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    converted = converter.convert()
+
+    # Write atomically so an interrupted conversion never leaves a broken cache
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(converted)
+    os.replace(temp_path, output_path)
+    return output_path
+
+class QuantizedEmotionModel:
+    """Run the int8 emotion model with predict_on_batch semantics of the Keras model
+
+    Takes the same (n, 48, 48, 1) float32 input in [0, 1] and returns (n, 7)
+    float32 probabilities, so it can be passed to EmotionClassifier as its model.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = load_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._input_scale, self._input_zero_point = self._input['quantization']
+        self._output_scale, self._output_zero_point = self._output['quantization']
+        self._batch_size = int(self._input['shape'][0])
+
+    def _resize(self, batch_size):
+        """Resize the input tensor when the batch size changes"""
+        if batch_size != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input['index'], [batch_size] + list(self._input['shape'][1:]))
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+    def quantize(self, batch):
+        """Map float input in [0, 1] onto the model's int8 input"""
+        if self._input['dtype'] != np.int8:
+            return batch.astype(self._input['dtype'], copy=False)
+        quantized = np.rint(batch / self._input_scale + self._input_zero_point)
+        return quantized.clip(-128, 127).astype(np.int8)
+
+    def predict_on_batch(self, batch):
+        """Return (n, 7) float32 probabilities for an (n, 48, 48, 1) float32 batch"""
+        self._resize(len(batch))
+        self.interpreter.set_tensor(self._input['index'], self.quantize(batch))
+        self.interpreter.invoke()
+
+        output = self.interpreter.get_tensor(self._output['index'])
+        if self._output['dtype'] == np.int8:
+            return (output.astype(np.float32) - self._output_zero_point) * self._output_scale
+        return output.astype(np.float32)
+
+def calibrate_emotion_model(calibration_dir, output_path=DEFAULT_MODEL_PATH):
+    """Convert the int8 model again, calibrated on the face crops in calibration_dir"""
+    crops = load_crops(calibration_dir, count=CALIBRATION_COUNT)
+    print(f"Converting emotion model to int8 calibrated on {len(crops)} crops from {calibration_dir} "
+          f"(cached at {output_path})...")
+    return convert_emotion_model(output_path, crops)
+
+def load_quantized_model(model_path=DEFAULT_MODEL_PATH, rebuild=False, num_threads=None):
+    """Load the cached int8 model, converting the Keras model first if needed"""
+    if rebuild or not os.path.exists(model_path):
+        print(f"Converting emotion model to int8 (cached at {model_path})...")
+        convert_emotion_model(model_path)
+    return QuantizedEmotionModel(model_path, num_threads)
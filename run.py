@@ -4,9 +4,27 @@ Emotion Detection Launcher
 Choose between full and simple versions of the emotion detector
 """
 
+import argparse
+import importlib
+import importlib.util
 import sys
 import os
 import subprocess
+import time
+
+# Detector variants: name -> (module, class)
+DETECTORS = {
+    'full': ('emotion_detector', 'EmotionDetector'),
+    'debug': ('debug_emotion_detector', 'DebugEmotionDetector'),
+    'simple': ('simple_emotion_detector', 'SimpleEmotionDetector'),
+    'test': ('test_simple_detection', 'SimpleTestDetector'),
+}
+
+# Detectors that run the emotion model and accept backend and model server options
+MODEL_DETECTORS = ('full', 'debug')
+
+# Detectors that record emotionScores and can write them to a session store
+STORE_DETECTORS = ('debug',)
 
 def print_banner():
     """Print the application banner"""
@@ -34,34 +52,44 @@ def print_menu():
     print("3. Exit")
     print()
 
+def missing_modules(names):
+    """Return the modules that are not installed, without importing them"""
+    return [name for name in names if importlib.util.find_spec(name) is None]
+
 def check_dependencies():
     """Check if required dependencies are installed"""
-    try:
-        import cv2
-        import numpy as np
-        import tkinter
-        from PIL import Image
-        print("✓ Basic dependencies found")
-        return True
-    except ImportError as e:
-        print(f"✗ Missing dependency: {e}")
+    missing = missing_modules(['cv2', 'numpy', 'tkinter', 'PIL'])
+    if missing:
+        print(f"✗ Missing dependency: {', '.join(missing)}")
         print("Please install dependencies using: pip install -r requirements.txt")
         return False
+    print("✓ Basic dependencies found")
+    return True
 
 def check_full_version_dependencies():
     """Check if full version dependencies are available"""
-    try:
-        import mediapipe
-        from deepface import DeepFace
-        print("✓ Full version dependencies found")
-        return True
-    except ImportError as e:
-        print(f"✗ Missing dependency for full version: {e}")
+    missing = missing_modules(['mediapipe', 'deepface'])
+    if missing:
+        print(f"✗ Missing dependency for full version: {', '.join(missing)}")
         print("Full version requires additional dependencies.")
         print("Install with: pip install mediapipe deepface")
         return False
+    print("✓ Full version dependencies found")
+    return True
+
+def detector_options(detector_name, backend, model_server=None, store_path=None, store_frames=False,
+                     record_frames=None):
+    """Keyword arguments for a detector's constructor or main function"""
+    options = {}
+    if record_frames is not None:
+        options.update(record_frames=record_frames)
+    if detector_name in MODEL_DETECTORS:
+        options.update(backend=backend, model_server=model_server)
+    if detector_name in STORE_DETECTORS and store_path:
+        options.update(store_path=store_path, store_frames=store_frames)
+    return options
 
-def run_full_version():
+def run_full_version(source=0, record_path=None, backend='keras', model_server=None, record_frames=None):
     """Run the full emotion detector"""
     print("Starting Full Version...")
     print("This version uses DeepFace for accurate emotion recognition.")
@@ -71,12 +99,12 @@ def run_full_version():
     try:
         # Import and run the full version
         from emotion_detector import main
-        main()
+        main(source, record_path, **detector_options('full', backend, model_server, record_frames=record_frames))
     except Exception as e:
         print(f"Error running full version: {e}")
         print("Try installing missing dependencies or use the simple version.")
 
-def run_simple_version():
+def run_simple_version(source=0, record_path=None, record_frames=None):
     """Run the simple emotion detector"""
     print("Starting Simple Version...")
     print("This version uses basic facial feature analysis.")
@@ -85,12 +113,74 @@ def run_simple_version():
     try:
         # Import and run the simple version
         from simple_emotion_detector import main
-        main()
+        main(source, record_path, **detector_options('simple', None, record_frames=record_frames))
     except Exception as e:
         print(f"Error running simple version: {e}")
 
-def main():
+def run_benchmark(detector_name, source, seconds, record_path=None, backend='keras', model_server=None,
+                  store_path=None, store_frames=False, record_frames=None):
+    """Run a detector on a frame source for a fixed time and report its frame rate"""
+    module_name, class_name = DETECTORS[detector_name]
+    detector_class = getattr(importlib.import_module(module_name), class_name)
+    
+    print(f"Benchmarking {detector_name} detector on {source} for {seconds:.0f}s...")
+    detector = detector_class(source, record_path,
+                              **detector_options(detector_name, backend, model_server, store_path, store_frames,
+                                                 record_frames))
+    start_time = time.time()
+    
+    def finish():
+        elapsed = time.time() - start_time
+        grabber = detector.grabber
+        print(f"Processed {detector.frames_processed} frames in {elapsed:.1f}s "
+              f"({detector.frames_processed / elapsed:.1f} FPS)")
+        if grabber:
+            stats = grabber.get_stats()
+            print(f"Captured {stats['captured']} frames, dropped {stats['dropped']}")
+        if hasattr(detector, 'startup'):
+            print(detector.startup.report())
+        detector.on_closing()
+    
+    detector.root.after(0, detector.start_camera)
+    detector.root.after(int(seconds * 1000), finish)
+    detector.run()
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Camera Emotions launcher")
+    parser.add_argument("--source", default="0",
+                        help="Camera index or frame source: synthetic[:WxH[@FPS]], "
+                             "images:DIR, video:PATH or replay:PATH[@SPEED] (default: 0)")
+    parser.add_argument("--detector", choices=sorted(DETECTORS),
+                        help="Run this detector directly instead of showing the menu")
+    parser.add_argument("--benchmark", type=float, metavar="SECONDS",
+                        help="Run the detector for SECONDS and report its frame rate")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Record the processed frames to PATH; replay them with --source replay:PATH")
+    parser.add_argument("--record-frames", type=int, default=None, metavar="N",
+                        help="Number of frames the recording can hold (default: 3000)")
+    parser.add_argument("--backend", choices=('keras', 'int8'), default="keras",
+                        help="Emotion model backend for the full and debug detectors: "
+                             "float Keras model or int8 TFLite (default: keras)")
+    parser.add_argument("--calibration", metavar="DIR",
+                        help="Convert the int8 model again before starting, calibrated on the face crops in DIR "
+                             "(otherwise it is calibrated on synthetic faces)")
+    parser.add_argument("--model-server", nargs="?", const=True, default=None, metavar="ADDRESS",
+                        help="Run the emotion model in a shared model server (start it with model_server.py) "
+                             "at ADDRESS or the server's default per-user socket; "
+                             "falls back to in-process inference if it is not running")
+    parser.add_argument("--store", metavar="PATH",
+                        help="Also write the debug detector's emotionScore records to the SQLite session store "
+                             "at PATH (see session_store.py)")
+    parser.add_argument("--store-frames", action="store_true",
+                        help="With --store, also store every face's per-frame result")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main launcher function"""
+    args = parse_args(argv)
+    source = int(args.source) if args.source.isdigit() else args.source
+    
     print_banner()
     
     # Check basic dependencies
@@ -98,6 +188,28 @@ def main():
         input("Press Enter to exit...")
         return
     
+    # Resolve the default model server address once the dependencies are known to be present
+    if args.model_server is True:
+        from model_server import DEFAULT_ADDRESS
+        args.model_server = DEFAULT_ADDRESS
+    
+    # Calibrate the cached int8 model on real face crops; the detectors then load it
+    if args.calibration:
+        from quantized_model import calibrate_emotion_model
+        calibrate_emotion_model(args.calibration)
+    
+    if args.benchmark:
+        run_benchmark(args.detector or 'simple', source, args.benchmark, args.record, args.backend,
+                      args.model_server, args.store, args.store_frames, args.record_frames)
+        return
+    
+    if args.detector:
+        module_name, _ = DETECTORS[args.detector]
+        options = detector_options(args.detector, args.backend, args.model_server, args.store, args.store_frames,
+                                   args.record_frames)
+        importlib.import_module(module_name).main(source, args.record, **options)
+        return
+    
     while True:
         print_menu()
         
@@ -107,15 +219,15 @@ def main():
             if choice == "1":
                 print("\nChecking full version dependencies...")
                 if check_full_version_dependencies():
-                    run_full_version()
+                    run_full_version(source, args.record, args.backend, args.model_server, args.record_frames)
                 else:
                     print("\nWould you like to try the simple version instead? (y/n): ", end="")
                     if input().lower().startswith('y'):
-                        run_simple_version()
+                        run_simple_version(source, args.record, args.record_frames)
                 break
                 
             elif choice == "2":
-                run_simple_version()
+                run_simple_version(source, args.record, args.record_frames)
                 break
                 
             elif choice == "3":
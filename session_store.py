@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Session Store
+Structured storage of emotion results in SQLite for reporting across devices:
+one row per recorded emotionScore (and optionally per frame), tagged with a
+session id and camera id. Rows are inserted from a background thread in
+batched transactions, and the database runs in WAL mode so reports can be
+queried while a detector is writing.
+"""
+
+import argparse
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from batch_queue import next_batch, stop_writer
+
+# Emotion labels, in the order of the score columns
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    camera_id TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS records (
+    session_id TEXT NOT NULL,
+    camera_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    face_id INTEGER,
+    {', '.join(f'{emotion} REAL' for emotion in EMOTIONS)}
+);
+CREATE TABLE IF NOT EXISTS frames (
+    session_id TEXT NOT NULL,
+    camera_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    face_id INTEGER,
+    emotion TEXT NOT NULL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS records_ts ON records (ts);
+CREATE INDEX IF NOT EXISTS records_session_ts ON records (session_id, ts);
+CREATE INDEX IF NOT EXISTS frames_ts ON frames (ts);
+CREATE INDEX IF NOT EXISTS frames_session_ts ON frames (session_id, ts);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+_INSERT = {
+    'records': f"INSERT INTO records VALUES (?, ?, ?, ?, {', '.join('?' for _ in EMOTIONS)})",
+    'frames': "INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+def connect(path):
+    """Open the store at path, creating its tables and indexes if needed"""
+    conn = sqlite3.connect(path, timeout=30.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def new_session_id():
+    """A session id unique across devices"""
+    return uuid.uuid4().hex
+
+class SessionWriter:
+    """Write one session's rows to the store at `path` from a background thread
+
+    add_record() and add_frame() never block: rows are queued (up to
+    max_queue, beyond which they are dropped and counted) and inserted in one
+    transaction per batch of up to max_batch rows, at least every
+    flush_interval seconds.
+    """
+
+    def __init__(self, path, camera_id=None, session_id=None, max_batch=500, flush_interval=2.0,
+                 max_queue=50000):
+        self.path = path
+        self.camera_id = camera_id or socket.gethostname()
+        self.session_id = session_id or new_session_id()
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.started = time.time()
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+
+        # Counters
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.transactions = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add_record(self, scores, timestamp, face_id=None):
+        """Queue an emotionScore vector (in EMOTIONS order) recorded at timestamp"""
+        self._put('records', (self.session_id, self.camera_id, timestamp, face_id, *map(float, scores)))
+
+    def add_frame(self, emotion, confidence, timestamp, face_id=None):
+        """Queue a per-frame result: the dominant emotion (or a status) and its confidence"""
+        self._put('frames', (self.session_id, self.camera_id, timestamp, face_id, emotion, float(confidence)))
+
+    def _put(self, table, row):
+        # Rows that arrive after close() are counted as dropped
+        if self.closed:
+            self.rows_dropped += 1
+            return
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.rows_dropped += 1
+
+    def close(self, timeout=5.0):
+        """Insert everything still queued, mark the session ended and close the database"""
+        if self._thread is None:
+            return
+        self.closed = True
+        self.rows_dropped += stop_writer(self._queue, self._thread, timeout)
+        self._thread = None
+
+    def get_stats(self):
+        """Return writer counters for display or logging"""
+        return {'written': self.rows_written, 'dropped': self.rows_dropped, 'transactions': self.transactions,
+                'errors': self.errors, 'queued': self._queue.qsize()}
+
+    def _run(self):
+        """Writer loop: insert each batch of queued rows in one transaction"""
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Error opening {self.path}: {e}")
+            return
+        self._execute(conn, [("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, NULL)",
+                              [(self.session_id, self.camera_id, self.started)])])
+
+        stopping = False
+        while not stopping:
+            batch, stopping = next_batch(self._queue, self.max_batch, self.flush_interval)
+            if batch:
+                statements = []
+                for table in _INSERT:
+                    rows = [row for row_table, row in batch if row_table == table]
+                    if rows:
+                        statements.append((_INSERT[table], rows))
+                if self._execute(conn, statements):
+                    self.rows_written += len(batch)
+
+        self._execute(conn, [("UPDATE sessions SET ended = ? WHERE session_id = ?",
+                              [(time.time(), self.session_id)])])
+        conn.close()
+
+    def _execute(self, conn, statements):
+        """Run (sql, rows) statements in one transaction; returns whether it was committed"""
+        try:
+            with conn:
+                for sql, rows in statements:
+                    conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Error writing to {self.path}: {e}")
+            return False
+        self.transactions += 1
+        return True
+
+class SessionStore:
+    """Queries over the store at `path`
+
+    Every query takes an optional [start, end) range of capture timestamps
+    (seconds since the epoch) and optional session_id and camera_id filters.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = connect(path)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    def _where(self, start=None, end=None, session_id=None, camera_id=None, column='ts'):
+        """WHERE clause and parameters for the common filters, the range applying to column"""
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(camera_id)
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append(f"{column} < ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def sessions(self, start=None, end=None, camera_id=None):
+        """Sessions started in the range, oldest first"""
+        where, params = self._where(start, end, camera_id=camera_id, column='started')
+        return [dict(row) for row in self.conn.execute(f"SELECT * FROM sessions{where} ORDER BY started", params)]
+
+    def records(self, start=None, end=None, session_id=None, camera_id=None):
+        """Recorded emotionScore rows in the range, oldest first"""
+        where, params = self._where(start, end, session_id, camera_id)
+        return [dict(row) for row in self.conn.execute(f"SELECT * FROM records{where} ORDER BY ts", params)]
+
+    def frames(self, start=None, end=None, session_id=None, camera_id=None):
+        """Per-frame rows in the range, oldest first"""
+        where, params = self._where(start, end, session_id, camera_id)
+        return [dict(row) for row in self.conn.execute(f"SELECT * FROM frames{where} ORDER BY ts", params)]
+
+    def emotion_aggregates(self, start=None, end=None, session_id=None, camera_id=None):
+        """Record count and per-emotion mean, min and max of the emotionScores in the range"""
+        where, params = self._where(start, end, session_id, camera_id)
+        columns = ", ".join(f"AVG({e}), MIN({e}), MAX({e})" for e in EMOTIONS)
+        row = self.conn.execute(f"SELECT COUNT(*), {columns} FROM records{where}", params).fetchone()
+        aggregates = {'count': row[0]}
+        for i, emotion in enumerate(EMOTIONS):
+            aggregates[emotion] = {'mean': row[1 + 3 * i], 'min': row[2 + 3 * i], 'max': row[3 + 3 * i]}
+        return aggregates
+
+    def frame_emotion_counts(self, start=None, end=None, session_id=None, camera_id=None):
+        """Number of frames per emotion (or status) in the range"""
+        where, params = self._where(start, end, session_id, camera_id)
+        sql = f"SELECT emotion, COUNT(*) FROM frames{where} GROUP BY emotion ORDER BY COUNT(*) DESC"
+        return dict(self.conn.execute(sql, params).fetchall())
+
+    def time_series(self, bucket_seconds, start=None, end=None, session_id=None, camera_id=None):
+        """Mean emotionScores per bucket_seconds bucket: a list of (bucket start, count, {emotion: mean})"""
+        where, params = self._where(start, end, session_id, camera_id)
+        means = ", ".join(f"AVG({e})" for e in EMOTIONS)
+        sql = (f"SELECT CAST(ts / ? AS INTEGER) AS bucket, COUNT(*), {means} FROM records{where} "
+               f"GROUP BY bucket ORDER BY bucket")
+        return [(row[0] * bucket_seconds, row[1], dict(zip(EMOTIONS, row[2:])))
+                for row in self.conn.execute(sql, [bucket_seconds] + params)]
+
+    def prune(self, before):
+        """Delete rows captured before the timestamp, and sessions left without rows"""
+        with self.conn:
+            self.conn.execute("DELETE FROM records WHERE ts < ?", (before,))
+            self.conn.execute("DELETE FROM frames WHERE ts < ?", (before,))
+            self.conn.execute("DELETE FROM sessions WHERE started < ? AND session_id NOT IN "
+                              "(SELECT session_id FROM records UNION SELECT session_id FROM frames)", (before,))
+
+def parse_time(text):
+    """Timestamp from seconds since the epoch or an ISO date/time"""
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp is not None else "-"
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Report on the emotion results in a session store")
+    parser.add_argument("database", help="Path to the SQLite session store")
+    parser.add_argument("report", choices=('sessions', 'summary', 'series'), nargs="?", default="summary",
+                        help="List sessions, summarize emotionScores, or print a bucketed time series "
+                             "(default: summary)")
+    parser.add_argument("--start", default=None, help="Start time, epoch seconds or ISO date/time")
+    parser.add_argument("--end", default=None, help="End time, epoch seconds or ISO date/time")
+    parser.add_argument("--session", default=None, help="Only this session id")
+    parser.add_argument("--camera", default=None, help="Only this camera id")
+    parser.add_argument("--bucket", type=float, default=3600.0,
+                        help="Bucket size in seconds for the series report (default: 3600)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main function to print a report from a session store"""
+    args = parse_args(argv)
+    store = SessionStore(args.database)
+    start, end = parse_time(args.start), parse_time(args.end)
+
+    try:
+        if args.report == 'sessions':
+            for session in store.sessions(start, end, args.camera):
+                print(f"{session['session_id']}  {session['camera_id']}  "
+                      f"{format_time(session['started'])} - {format_time(session['ended'])}")
+        elif args.report == 'summary':
+            aggregates = store.emotion_aggregates(start, end, args.session, args.camera)
+            print(f"Records: {aggregates['count']}")
+            if aggregates['count']:
+                print(f"{'emotion':<10}{'mean':>8}{'min':>8}{'max':>8}")
+                for emotion in EMOTIONS:
+                    stats = aggregates[emotion]
+                    print(f"{emotion:<10}{stats['mean']:>8.1f}{stats['min']:>8.1f}{stats['max']:>8.1f}")
+            counts = store.frame_emotion_counts(start, end, args.session, args.camera)
+            if counts:
+                print("Frames: " + ", ".join(f"{emotion}: {count}" for emotion, count in counts.items()))
+        else:
+            print(f"{'bucket':<21}{'records':>8}" + "".join(f"{emotion:>10}" for emotion in EMOTIONS))
+            for bucket, count, means in store.time_series(args.bucket, start, end, args.session, args.camera):
+                print(f"{format_time(bucket):<21}{count:>8}" + "".join(f"{means[e]:>10.1f}" for e in EMOTIONS))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
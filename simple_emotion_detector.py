@@ -2,22 +2,38 @@ import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import threading
-import time
-import os
+from frame_grabber import FrameGrabber
+from frame_recorder import FrameRecorder, DEFAULT_CAPACITY
+from frame_sources import open_frame_source, describe_source
+from face_search import DETECTION_WIDTH, RoiFaceSearch
+from frame_scheduler import AdaptiveScheduler
+from frame_display import FrameDisplay
 
 class SimpleEmotionDetector:
-    def __init__(self):
+    def __init__(self, source=0, record_path=None, record_frames=DEFAULT_CAPACITY, detection_width=DETECTION_WIDTH, full_scan_interval=15,
+                 target_fps=20.0, cpu_budget=0.8):
         # Load OpenCV's pre-trained face detection model
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         
+        # Search around the last face at similar scales, with a full-frame scan every full_scan_interval frames
+        self.face_search = RoiFaceSearch(self.face_cascade, detection_width=detection_width,
+                                         full_scan_interval=full_scan_interval)
+        
         # Simple emotion detection using facial features
+        self.source = source  # Camera index or frame source spec (see frame_sources.py)
+        self.record_path = record_path  # Record processed frames here for later replay
+        self.record_frames = record_frames  # Frames the recording can hold
         self.cap = None
+        self.grabber = None
         self.is_running = False
+        self.frames_processed = 0
         self.current_emotion = "No face detected"
         self.emotion_confidence = 0.0
         
+        # Paces the loop to target_fps within the CPU budget
+        self.scheduler = AdaptiveScheduler(target_fps=target_fps, cpu_budget=cpu_budget)
+        
         # Create GUI
         self.setup_gui()
         
@@ -49,6 +65,7 @@ class SimpleEmotionDetector:
         
         self.video_label = tk.Label(self.video_frame, bg='#34495e')
         self.video_label.pack(padx=10, pady=10)
+        self.display = FrameDisplay(self.root, self.video_label, 600, 400)
         
         # Emotion display frame
         emotion_frame = tk.Frame(main_frame, bg='#2c3e50')
@@ -96,9 +113,18 @@ class SimpleEmotionDetector:
     def start_camera(self):
         """Start the webcam and emotion detection"""
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.source)
             if not self.cap.isOpened():
-                raise Exception("Could not open webcam")
+                raise Exception(f"Could not open {describe_source(self.source)}")
+            
+            # Read frames on a dedicated thread so processing always gets the freshest frame
+            recorder = FrameRecorder(self.record_path, self.record_frames) if self.record_path else None
+            self.grabber = FrameGrabber(self.cap, recorder).start()
+            
+            # Replays are analyzed frame by frame at the pace the source sets; recordings
+            # and replays run inference at a fixed stride so both make the same decisions
+            self.scheduler.set_lossless(self.grabber.lossless)
+            self.scheduler.pin_stride(self.grabber.pinned_stride)
             
             self.is_running = True
             self.start_button.config(state='disabled')
@@ -116,7 +142,11 @@ class SimpleEmotionDetector:
     def stop_camera(self):
         """Stop the webcam and emotion detection"""
         self.is_running = False
-        if self.cap:
+        if self.grabber:
+            # The grabber releases the capture once its thread is out of cap.read()
+            self.grabber.stop(release=True)
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         self.start_button.config(state='normal')
@@ -124,7 +154,7 @@ class SimpleEmotionDetector:
         self.status_label.config(text="Camera stopped")
         
         # Clear video display
-        self.video_label.config(image='')
+        self.display.clear()
         
     def simple_emotion_detection(self, face_region):
         """Simple emotion detection based on facial features"""
@@ -160,37 +190,50 @@ class SimpleEmotionDetector:
             
         except Exception as e:
             return "Unknown", 0.0
-        
+            
     def process_video(self):
         """Process video frames and detect emotions"""
+        grabber = self.grabber
+        scheduler = self.scheduler
+        
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            # Always take the newest captured frame; stale ones are dropped by the grabber
+            captured = grabber.read_latest()
+            if captured is None:
+                if grabber.ended:
+                    # The source has no more frames, e.g. the end of a replay
+                    self.root.after(0, self.stop_camera)
+                    break
                 continue
                 
+            frame = captured.frame
+            self.frames_processed += 1
+            scheduler.begin_frame()
+            
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Detect faces
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            # Detect faces on a downscaled grayscale copy, restricted to the area around the last face;
+            # boxes come back in full-resolution coordinates
+            with scheduler.measure('detect'):
+                faces = self.face_search.find_faces(frame)
             
             if len(faces) > 0:
                 # Use the largest face
                 largest_face = max(faces, key=lambda x: x[2] * x[3])
                 x, y, w, h = largest_face
                 
-                # Draw face detection box
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                
-                # Extract face region for emotion detection
-                face_region = frame[y:y+h, x:x+w]
+                # Extract the full-resolution face region
+                face_region = frame[y:y+h, x:x+w].copy()
                 
                 if face_region.size > 0:
                     # Detect emotion
-                    emotion, confidence = self.simple_emotion_detection(face_region)
+                    if scheduler.should_infer():
+                        with scheduler.measure('infer'):
+                            emotion, confidence = self.simple_emotion_detection(face_region)
+                    else:
+                        # Hold the last result between inferences
+                        emotion, confidence = self.current_emotion, self.emotion_confidence
                     
                     self.current_emotion = emotion
                     self.emotion_confidence = confidence
@@ -202,23 +245,16 @@ class SimpleEmotionDetector:
                 self.emotion_confidence = 0.0
                 self.root.after(0, self.update_emotion_display)
             
-            # Convert frame for GUI display
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
-            
-            # Resize frame to fit GUI
-            display_width = 600
-            display_height = 400
-            frame_pil = frame_pil.resize((display_width, display_height), Image.Resampling.LANCZOS)
-            
-            frame_tk = ImageTk.PhotoImage(frame_pil)
-            
-            # Update video display
-            self.root.after(0, lambda: self.video_label.config(image=frame_tk))
-            self.root.after(0, lambda: setattr(self.video_label, 'image', frame_tk))
+            # Resize into the display buffer, draw the face box on it and update the video display;
+            # skipped while the window is hidden
+            with scheduler.measure('display'):
+                if self.display.prepare(frame) is not None:
+                    if len(faces) > 0:
+                        self.display.draw_face(largest_face)
+                    self.display.show()
             
-            # Control frame rate
-            time.sleep(0.05)  # ~20 FPS
+            # Control frame rate (~20 FPS) within the CPU budget
+            scheduler.end_frame()
             
     def update_emotion_display(self):
         """Update emotion and confidence labels in GUI"""
@@ -234,13 +270,13 @@ class SimpleEmotionDetector:
         """Start the GUI application"""
         self.root.mainloop()
 
-def main():
+def main(source=0, record_path=None, record_frames=DEFAULT_CAPACITY):
     """Main function to run the simple emotion detector"""
     print("Starting Simple Emotion Detection System...")
     print("This version uses basic facial feature analysis.")
     print("For more accurate results, use the full version with DeepFace.")
     
-    detector = SimpleEmotionDetector()
+    detector = SimpleEmotionDetector(source, record_path, record_frames)
     detector.run()
 
 if __name__ == "__main__":
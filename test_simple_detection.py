@@ -2,21 +2,38 @@ import cv2
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import threading
-import time
+from frame_grabber import FrameGrabber
+from frame_recorder import FrameRecorder, DEFAULT_CAPACITY
+from frame_sources import open_frame_source, describe_source
+from face_search import DETECTION_WIDTH, RoiFaceSearch
+from frame_scheduler import AdaptiveScheduler
+from frame_display import FrameDisplay
 
 class SimpleTestDetector:
-    def __init__(self):
+    def __init__(self, source=0, record_path=None, record_frames=DEFAULT_CAPACITY, detection_width=DETECTION_WIDTH, full_scan_interval=15,
+                 target_fps=20.0, cpu_budget=0.8):
         # Load OpenCV's pre-trained face detection model
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         
+        # Search around the last face at similar scales, with a full-frame scan every full_scan_interval frames
+        self.face_search = RoiFaceSearch(self.face_cascade, detection_width=detection_width,
+                                         full_scan_interval=full_scan_interval)
+        
+        self.source = source  # Camera index or frame source spec (see frame_sources.py)
+        self.record_path = record_path  # Record processed frames here for later replay
+        self.record_frames = record_frames  # Frames the recording can hold
         self.cap = None
+        self.grabber = None
         self.is_running = False
+        self.frames_processed = 0
         self.current_emotion = "No face detected"
         self.emotion_confidence = 0.0
         self.debug_info = "Initializing..."
         
+        # Paces the loop to target_fps within the CPU budget
+        self.scheduler = AdaptiveScheduler(target_fps=target_fps, cpu_budget=cpu_budget)
+        
         # Create GUI
         self.setup_gui()
         
@@ -49,6 +66,7 @@ class SimpleTestDetector:
         
         self.video_label = tk.Label(self.video_frame, bg='#34495e')
         self.video_label.pack(padx=10, pady=10)
+        self.display = FrameDisplay(self.root, self.video_label, 600, 400)
         
         # Debug information frame
         debug_frame = tk.Frame(main_frame, bg='#2c3e50')
@@ -100,9 +118,18 @@ class SimpleTestDetector:
     def start_camera(self):
         """Start the webcam and emotion detection"""
         try:
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.source)
             if not self.cap.isOpened():
-                raise Exception("Could not open webcam")
+                raise Exception(f"Could not open {describe_source(self.source)}")
+            
+            # Read frames on a dedicated thread so processing always gets the freshest frame
+            recorder = FrameRecorder(self.record_path, self.record_frames) if self.record_path else None
+            self.grabber = FrameGrabber(self.cap, recorder).start()
+            
+            # Replays are analyzed frame by frame at the pace the source sets; recordings
+            # and replays run inference at a fixed stride so both make the same decisions
+            self.scheduler.set_lossless(self.grabber.lossless)
+            self.scheduler.pin_stride(self.grabber.pinned_stride)
             
             self.is_running = True
             self.start_button.config(state='disabled')
@@ -120,7 +147,11 @@ class SimpleTestDetector:
     def stop_camera(self):
         """Stop the webcam and emotion detection"""
         self.is_running = False
-        if self.cap:
+        if self.grabber:
+            # The grabber releases the capture once its thread is out of cap.read()
+            self.grabber.stop(release=True)
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         self.start_button.config(state='normal')
@@ -128,7 +159,7 @@ class SimpleTestDetector:
         self.status_label.config(text="Camera stopped")
         
         # Clear video display
-        self.video_label.config(image='')
+        self.display.clear()
         
     def simple_emotion_detection(self, face_region):
         """Simple emotion detection based on facial features"""
@@ -161,48 +192,60 @@ class SimpleTestDetector:
             
         except Exception as e:
             return "Unknown", 0.0
-        
+            
     def process_video(self):
         """Process video frames and detect emotions"""
         frame_count = 0
         detection_count = 0
         
+        grabber = self.grabber
+        scheduler = self.scheduler
+        
         while self.is_running:
-            ret, frame = self.cap.read()
-            if not ret:
+            # Always take the newest captured frame; stale ones are dropped by the grabber
+            captured = grabber.read_latest()
+            if captured is None:
+                if grabber.ended:
+                    # The source has no more frames, e.g. the end of a replay
+                    self.root.after(0, self.stop_camera)
+                    break
                 self.debug_info = "Failed to read frame from camera"
                 self.root.after(0, self.update_debug_display)
                 continue
                 
+            frame = captured.frame
+            self.frames_processed += 1
+            scheduler.begin_frame()
             frame_count += 1
             
             # Flip frame horizontally for mirror effect
             frame = cv2.flip(frame, 1)
             
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Detect faces
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+            # Detect faces on a downscaled grayscale copy, restricted to the area around the last face;
+            # boxes come back in full-resolution coordinates
+            with scheduler.measure('detect'):
+                faces = self.face_search.find_faces(frame)
             
             if len(faces) > 0:
-                self.debug_info = f"Face detected! Frame: {frame_count}"
+                self.debug_info = f"Face detected! Frame: {frame_count} (dropped: {grabber.frames_dropped})"
                 
                 # Use the largest face
                 largest_face = max(faces, key=lambda x: x[2] * x[3])
                 x, y, w, h = largest_face
                 
-                # Draw face detection box
-                cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                
-                # Extract face region for emotion detection
-                face_region = frame[y:y+h, x:x+w]
+                # Extract the full-resolution face region
+                face_region = frame[y:y+h, x:x+w].copy()
                 
                 if face_region.size > 0:
                     self.debug_info = f"Face region extracted: {face_region.shape}"
                     
                     # Detect emotion
-                    emotion, confidence = self.simple_emotion_detection(face_region)
+                    if scheduler.should_infer():
+                        with scheduler.measure('infer'):
+                            emotion, confidence = self.simple_emotion_detection(face_region)
+                    else:
+                        # Hold the last result between inferences
+                        emotion, confidence = self.current_emotion, self.emotion_confidence
                     
                     self.current_emotion = emotion
                     self.emotion_confidence = confidence
@@ -223,23 +266,16 @@ class SimpleTestDetector:
             # Update debug display
             self.root.after(0, self.update_debug_display)
             
-            # Convert frame for GUI display
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_pil = Image.fromarray(frame_rgb)
-            
-            # Resize frame to fit GUI
-            display_width = 600
-            display_height = 400
-            frame_pil = frame_pil.resize((display_width, display_height), Image.Resampling.LANCZOS)
-            
-            frame_tk = ImageTk.PhotoImage(frame_pil)
-            
-            # Update video display
-            self.root.after(0, lambda: self.video_label.config(image=frame_tk))
-            self.root.after(0, lambda: setattr(self.video_label, 'image', frame_tk))
+            # Resize into the display buffer, draw the face box on it and update the video display;
+            # skipped while the window is hidden
+            with scheduler.measure('display'):
+                if self.display.prepare(frame) is not None:
+                    if len(faces) > 0:
+                        self.display.draw_face(largest_face)
+                    self.display.show()
             
-            # Control frame rate
-            time.sleep(0.05)  # ~20 FPS
+            # Control frame rate (~20 FPS) within the CPU budget
+            scheduler.end_frame()
             
     def update_emotion_display(self):
         """Update emotion and confidence labels in GUI"""
@@ -248,7 +284,7 @@ class SimpleTestDetector:
         
     def update_debug_display(self):
         """Update debug information in GUI"""
-        self.debug_label.config(text=f"Debug: {self.debug_info}")
+        self.debug_label.config(text=f"Debug: {self.debug_info}\nScheduler: {self.scheduler.report()}")
         
     def on_closing(self):
         """Handle window closing"""
@@ -259,12 +295,12 @@ class SimpleTestDetector:
         """Start the GUI application"""
         self.root.mainloop()
 
-def main():
+def main(source=0, record_path=None, record_frames=DEFAULT_CAPACITY):
     """Main function to run the simple test detector"""
     print("Starting Simple Test - Face & Emotion Detection...")
     print("This version uses basic facial feature analysis (no DeepFace).")
     
-    detector = SimpleTestDetector()
+    detector = SimpleTestDetector(source, record_path, record_frames)
     detector.run()
 
 if __name__ == "__main__":